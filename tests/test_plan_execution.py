@@ -0,0 +1,58 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("langchain_core")
+
+# "0" keys put every client on its dummy data so nothing here touches the network
+for _var in ("OPENAI_API_KEY", "AMADEUS_API_KEY", "AMADEUS_API_SECRET", "BOOKING_API_KEY",
+             "TRIPADVISOR_API_KEY", "GETYOURGUIDE_API_KEY"):
+    os.environ.setdefault(_var, "0")
+os.environ.setdefault("TRAVEL_BUDDY_SKIP_DEPCHECK", "1")
+os.environ.setdefault("TRAVEL_BUDDY_REDIS_URL", "")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+import travel_buddy_ph as tb
+
+
+class _FailingTool:
+    """Plan tool whose every call raises, like a provider outage"""
+
+    async def ainvoke(self, tool_input):
+        raise RuntimeError("flight search unavailable")
+
+
+PLAN = [
+    {"id": "flights", "tool": "search_flights", "depends_on": [], "args": {
+        "departure_city": "NYC", "destination": "Paris", "departure_date": "2026-11-01",
+        "return_date": "2026-11-05", "travelers": 2, "budget_per_person": 1500}},
+    {"id": "hotels", "tool": "search_hotels", "depends_on": [], "args": {
+        "destination": "Paris", "checkin_date": "2026-11-01", "checkout_date": "2026-11-05",
+        "budget_per_night": 200, "travelers": 2}},
+    {"id": "activities", "tool": "recommend_activities", "depends_on": [], "args": {
+        "destination": "Paris", "activity_preferences": ["museums"],
+        "daily_activity_budget": 100, "trip_duration_days": 4}},
+    {"id": "budget", "tool": "optimize_travel_budget", "depends_on": ["flights", "hotels", "activities"], "args": {
+        "total_budget": 3000, "travelers": 2, "trip_duration_days": 4,
+        "flights": "$flights.flights", "hotels": "$hotels.hotels", "activities": "$activities.activities"}},
+    {"id": "itinerary", "tool": "generate_detailed_itinerary", "depends_on": ["budget"], "args": {
+        "destination": "Paris", "checkin_date": "2026-11-01", "checkout_date": "2026-11-05",
+        "selected_flight": "$budget.selected_flight", "selected_hotel": "$budget.selected_hotel",
+        "selected_activities": "$budget.selected_activities"}},
+]
+
+
+def test_failed_search_step_still_builds_itinerary(monkeypatch):
+    monkeypatch.setitem(tb.PLAN_TOOLS, "search_flights", _FailingTool())
+    plan = tb._parse_plan(orjson.dumps(PLAN).decode())
+
+    results = asyncio.run(tb._execute_plan(plan))
+
+    assert "error" in results["flights"]
+    assert "error" not in results["budget"]
+    assert results["itinerary"]
+    assert "error" not in results["itinerary"]
@@ -834,7 +834,7 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
     
     # Day 1: Arrival
     day_1 = {
-        "date": start_date.strftime("%Y-%m-%d"),
+        "date": start_date.date().isoformat(),
         "day_number": 1,
         "title": "Arrival Day",
         "activities": [
@@ -947,7 +947,7 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
         daily_total += 60
         
         day_plan = {
-            "date": current_date.strftime("%Y-%m-%d"),
+            "date": current_date.date().isoformat(),
             "day_number": day_num,
             "title": f"Day {day_num} - Exploration",
             "activities": day_activities,
@@ -957,7 +957,7 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
     
     # Last day: Departure
     departure_day = {
-        "date": end_date.strftime("%Y-%m-%d"),
+        "date": end_date.date().isoformat(),
         "day_number": trip_duration + 1,
         "title": "Departure Day",
         "activities": [
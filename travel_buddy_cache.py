@@ -0,0 +1,68 @@
+"""Shared Redis cache for Travel Buddy™ tool results.
+
+Process-local memoization only helps the worker that computed a result. When
+TRAVEL_BUDDY_REDIS_URL is set, tool results are also kept in Redis so every
+worker process can reuse them. Without Redis, or whenever it is unreachable,
+calls fall through to the live loader.
+"""
+import asyncio
+import logging
+import os
+import weakref
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+
+try:
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    # Redis is optional; without it every call goes straight to the loader
+    aioredis = None
+    RedisError = OSError
+
+logger = logging.getLogger("travel_buddy.cache")
+
+REDIS_URL = os.getenv("TRAVEL_BUDDY_REDIS_URL", "")
+
+# Keep Redis hiccups cheap: a slow cache must never cost more than the live call it fronts
+REDIS_TIMEOUT = 0.5
+
+# Async Redis connections belong to the loop that opened them, and each asyncio.run starts a
+# new loop, so keep one client per loop
+_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+def get_client():
+    """Return the running loop's async Redis client, or None when Redis isn't configured"""
+    if aioredis is None or not REDIS_URL:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _CLIENTS.get(loop)
+    if client is None:
+        client = _CLIENTS[loop] = aioredis.from_url(REDIS_URL, socket_timeout=REDIS_TIMEOUT,
+                                                    socket_connect_timeout=REDIS_TIMEOUT)
+    return client
+
+async def cached_json(key: str, ttl_s: int, loader: Callable[[], Awaitable[Any]],
+                      cache_if: Optional[Callable[[Any], bool]] = None) -> Any:
+    """Return the JSON value stored under key, or await loader() and store its result for ttl_s seconds"""
+    client = get_client()
+
+    if client is not None:
+        try:
+            cached = await client.get(key)
+            if cached is not None:
+                return orjson.loads(cached)
+        except (RedisError, OSError, ValueError) as e:
+            logger.warning("Redis cache unavailable, using live data: %s", e)
+            client = None
+
+    result = await loader()
+
+    if client is not None and (cache_if is None or cache_if(result)):
+        try:
+            await client.setex(key, ttl_s, orjson.dumps(result))
+        except (RedisError, OSError, TypeError) as e:
+            logger.warning("Could not store %s in Redis cache: %s", key, e)
+
+    return result
@@ -1209,7 +1209,7 @@ def generate_itinerary_node(state: TravelPlanState):
             })
         
         day_1 = {
-            "date": start_date.strftime("%Y-%m-%d"),
+            "date": start_date.date().isoformat(),
             "day_number": 1,
             "title": "Arrival Day",
             "activities": [
@@ -1286,7 +1286,7 @@ def generate_itinerary_node(state: TravelPlanState):
             daily_total += 60
             
             day_plan = {
-                "date": current_date.strftime("%Y-%m-%d"),
+                "date": current_date.date().isoformat(),
                 "day_number": day_num,
                 "title": f"Day {day_num} - Exploration",
                 "activities": day_activities,
@@ -1295,7 +1295,7 @@ def generate_itinerary_node(state: TravelPlanState):
             itinerary.append(day_plan)
         
         departure_day = {
-            "date": end_date.strftime("%Y-%m-%d"),
+            "date": end_date.date().isoformat(),
             "day_number": trip_duration + 1,
             "title": "Departure Day",
             "activities": [
@@ -9,6 +9,7 @@ from typing_extensions import Literal
 from typing import Dict, List, Any, Optional, cast
 import time
 import re
+import logging
 
 # ============ DEPENDENCY INSTALLATION ============
 
@@ -69,11 +70,9 @@ _set_env("GETYOURGUIDE_API_KEY")
 
 # Import LangChain modules after installation
 try:
-    from langchain_core.tools import tool
     from langchain_core.messages import AIMessage, HumanMessage
     # from langchain_anthropic import ChatAnthropic
     from langchain_openai import ChatOpenAI
-    from langgraph.graph import StateGraph, START, END
     from langgraph.graph.message import add_messages
     from typing import TypedDict, Annotated
     from langchain_core.messages import convert_to_messages
@@ -83,6 +82,8 @@ except ImportError as e:
     print("Please ensure all packages are installed correctly.")
     sys.exit(1)
 
+logger = logging.getLogger(__name__)
+
 # Initialize the model
 model = ChatOpenAI(
     model="gpt-4o-mini",
@@ -1005,7 +1006,7 @@ def get_destination_info_tool(destination: str):
 
 def extract_requirements_node(state: TravelPlanState) -> TravelPlanState:
     """Extract user requirements from messages"""
-    print("Extracting user requirements...")
+    logger.info("Extracting user requirements...")
     
     requirements = extract_user_requirements(state["messages"])
     
@@ -1044,7 +1045,7 @@ def extract_requirements_node(state: TravelPlanState) -> TravelPlanState:
 
 def search_flights_node(state: TravelPlanState) -> TravelPlanState:
     """Search for flights"""
-    print("Searching for flights...")
+    logger.info("Searching for flights...")
     
     try:
         flights = search_flights_tool(
@@ -1060,12 +1061,12 @@ def search_flights_node(state: TravelPlanState) -> TravelPlanState:
         return {**state, "flights_data": flights}
         
     except Exception as e:
-        print(f"Error searching flights: {e}")
+        logger.error("Error searching flights: %s", e)
         return {**state, "error_occurred": True}
 
 def search_hotels_node(state: TravelPlanState) -> TravelPlanState:
     """Search for hotels"""
-    print("Searching for hotels...")
+    logger.info("Searching for hotels...")
     
     try:
         # Calculate budget per night (rough estimate: 40% of total budget for hotels)
@@ -1084,12 +1085,12 @@ def search_hotels_node(state: TravelPlanState) -> TravelPlanState:
         return {**state, "hotels_data": hotels}
         
     except Exception as e:
-        print(f"Error searching hotels: {e}")
+        logger.error("Error searching hotels: %s", e)
         return {**state, "error_occurred": True}
 
 def search_activities_node(state: TravelPlanState) -> TravelPlanState:
     """Search for activities"""
-    print("Searching for activities...")
+    logger.info("Searching for activities...")
     
     try:
         # Calculate daily activity budget (rough estimate: 20% of total budget for activities)
@@ -1107,24 +1108,24 @@ def search_activities_node(state: TravelPlanState) -> TravelPlanState:
         return {**state, "activities_data": activities}
         
     except Exception as e:
-        print(f"Error searching activities: {e}")
+        logger.error("Error searching activities: %s", e)
         return {**state, "error_occurred": True}
 
 def get_destination_info_node(state: TravelPlanState) -> TravelPlanState:
     """Get destination information"""
-    print("Getting destination information...")
+    logger.info("Getting destination information...")
     
     try:
         dest_info = get_destination_info_tool(state.get("destination") or "Paris")
         return {**state, "destination_info": dest_info}
         
     except Exception as e:
-        print(f"Error getting destination info: {e}")
+        logger.error("Error getting destination info: %s", e)
         return {**state, "error_occurred": True}
 
 def optimize_budget_node(state: TravelPlanState) -> TravelPlanState:
     """Optimize budget and select best options"""
-    print("Optimizing budget and selecting best options...")
+    logger.info("Optimizing budget and selecting best options...")
     
     try:
         # Prepare data for optimization
@@ -1181,12 +1182,12 @@ def optimize_budget_node(state: TravelPlanState) -> TravelPlanState:
         }
         
     except Exception as e:
-        print(f"Error optimizing budget: {e}")
+        logger.error("Error optimizing budget: %s", e)
         return {**state, "error_occurred": True}
 
 def generate_itinerary_node(state: TravelPlanState) -> TravelPlanState:
     """Generate detailed itinerary"""
-    print("Generating detailed itinerary...")
+    logger.info("Generating detailed itinerary...")
     
     try:
         destination = state.get("destination") or "Paris"
@@ -1214,7 +1215,7 @@ def generate_itinerary_node(state: TravelPlanState) -> TravelPlanState:
         
         # Day 1: Arrival
         day_1 = {
-            "date": start_date.strftime("%Y-%m-%d"),
+            "date": start_date.date().isoformat(),
             "day_number": 1,
             "title": "Arrival Day",
             "activities": [
@@ -1293,7 +1294,7 @@ def generate_itinerary_node(state: TravelPlanState) -> TravelPlanState:
             daily_total += 60
             
             day_plan = {
-                "date": current_date.strftime("%Y-%m-%d"),
+                "date": current_date.date().isoformat(),
                 "day_number": day_num,
                 "title": f"Day {day_num} - Exploration",
                 "activities": day_activities,
@@ -1303,7 +1304,7 @@ def generate_itinerary_node(state: TravelPlanState) -> TravelPlanState:
         
         # Last day: Departure
         departure_day = {
-            "date": end_date.strftime("%Y-%m-%d"),
+            "date": end_date.date().isoformat(),
             "day_number": trip_duration + 1,
             "title": "Departure Day",
             "activities": [
@@ -1352,12 +1353,12 @@ def generate_itinerary_node(state: TravelPlanState) -> TravelPlanState:
         return {**state, "itinerary": itinerary_result, "processing_complete": True}
         
     except Exception as e:
-        print(f"Error generating itinerary: {e}")
+        logger.error("Error generating itinerary: %s", e)
         return {**state, "error_occurred": True}
 
 def format_final_response_node(state: TravelPlanState) -> TravelPlanState:
     """Format the final response for the user"""
-    print("Formatting final response...")
+    logger.info("Formatting final response...")
     
     try:
         # Extract all the gathered information with proper None handling
@@ -1423,17 +1424,21 @@ FLIGHT OPTIONS FOUND
             response += f"Total Trip Cost: ${total_cost:.2f} per person\n"
             response += f"Total Days: {itinerary.get('total_days', 0)} days\n\n"
             
-            for day in itinerary.get('itinerary', []):
-                if day.get('type') == 'destination_info':
+            days = itinerary.get('itinerary') or ()
+            for day in days:
+                day_get = day.get
+                if day_get('type') == 'destination_info':
                     continue
-                    
-                response += f"DAY {day.get('day_number', 0)} - {day.get('title', 'Unknown')} ({day.get('date', 'N/A')})\n"
-                for activity in day.get('activities', []):
-                    response += f"  {activity.get('time', 'N/A')}: {activity.get('activity', 'Unknown')}\n"
-                    response += f"    {activity.get('description', 'N/A')}\n"
-                    if activity.get('cost', 0) > 0:
-                        response += f"    Cost: ${activity.get('cost', 0):.2f}\n"
-                response += f"  Daily Total: ${day.get('daily_total', 0):.2f}\n\n"
+
+                response += f"DAY {day_get('day_number', 0)} - {day_get('title', 'Unknown')} ({day_get('date', 'N/A')})\n"
+                for activity in day_get('activities') or ():
+                    a_get = activity.get
+                    response += f"  {a_get('time', 'N/A')}: {a_get('activity', 'Unknown')}\n"
+                    response += f"    {a_get('description', 'N/A')}\n"
+                    cost = a_get('cost', 0)
+                    if cost > 0:
+                        response += f"    Cost: ${cost:.2f}\n"
+                response += f"  Daily Total: ${day_get('daily_total', 0):.2f}\n\n"
         
         response += f"\nBOOKING INFORMATION\n"
         response += f"Flight Booking: Use token {selected_flight.get('booking_token', 'N/A')}\n"
@@ -1445,7 +1450,7 @@ FLIGHT OPTIONS FOUND
         return {**state, "final_response": response}
         
     except Exception as e:
-        print(f"Error formatting response: {e}")
+        logger.error("Error formatting response: %s", e)
         return {**state, "final_response": "Sorry, there was an error formatting your travel plan. Please try again."}
 
 # ============ ROUTING FUNCTION ============
@@ -1496,6 +1501,9 @@ def route_to_next_node(state: TravelPlanState) -> str:
 
 def create_travel_planning_graph():
     """Create and configure the travel planning state graph"""
+    # Imported here so callers that only need the routing/printing helpers
+    # don't pay for loading the graph builder
+    from langgraph.graph import StateGraph, START, END
     
     # Create the state graph
     workflow = StateGraph(TravelPlanState)
@@ -1540,7 +1548,7 @@ def travel_planner_workflow(input_data):
         messages = input_data
 
     try:
-        print("Starting Travel Planning State Machine...")
+        logger.info("Starting Travel Planning State Machine...")
         
         # Create the graph
         app = create_travel_planning_graph()
@@ -1586,9 +1594,7 @@ def travel_planner_workflow(input_data):
         return [response_message]
         
     except Exception as e:
-        print(f"Error in Travel Planning State Machine: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in Travel Planning State Machine: %s", e)
         
         # Return error message
         error_message = AIMessage(
@@ -1626,6 +1632,9 @@ def pretty_print_messages(messages):
 # ============ MAIN EXECUTION ============
 
 if __name__ == "__main__":
+    # Node status lines go through logging; surface them on the console for CLI runs
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     print("\nWelcome to Travel Buddy™ with Custom LangGraph State Machine!")
     print("=" * 70)
     print("Note: This system uses dummy data for partner-only APIs (Booking.com, TripAdvisor, GetYourGuide)")
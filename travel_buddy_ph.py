@@ -1,49 +1,82 @@
 import os
 import getpass
+import tempfile
 import subprocess
 import sys
+import importlib
+import importlib.util
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
-from datetime import datetime, timedelta
+import re
+import io
+import logging
+import logging.handlers
+import queue
+import atexit
+from datetime import date, datetime, timedelta
 from typing_extensions import Literal
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 import time
+import random
+import weakref
+import hashlib
+import bisect
+import heapq
+import threading
+import asyncio
+import functools
+import copy
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from operator import attrgetter
+from types import MappingProxyType
+
+# Diagnostics go through logging; interactive prompts and the trip plan itself are printed
+logger = logging.getLogger("travel_buddy")
 
 # ============ DEPENDENCY INSTALLATION ============
 
+REQUIRED_PACKAGES = {
+    "langchain-openai": "langchain_openai",
+    # "langchain-anthropic": "langchain_anthropic",
+    "langgraph": "langgraph",
+    "requests": "requests",
+    "typing-extensions": "typing_extensions",
+    "orjson": "orjson"
+}
+
+def _missing_dependencies():
+    """Return required packages that are not installed, probing without importing them"""
+    return [
+        package_name for package_name, import_name in REQUIRED_PACKAGES.items()
+        if importlib.util.find_spec(import_name) is None
+    ]
+
 def install_dependencies():
     """Install required packages for the Travel Buddy™"""
     print("Setting up Travel Buddy™ dependencies...")
     
-    required_packages = {
-        "langchain-openai": "langchain_openai",
-        # "langchain-anthropic": "langchain_anthropic",
-        "langgraph": "langgraph",
-        "requests": "requests",
-        "typing-extensions": "typing_extensions"
-    }
-    
-    for package_name, import_name in required_packages.items():
+    for package_name in _missing_dependencies():
+        print(f"Installing {package_name}...")
         try:
-            # Try to import the package
-            __import__(import_name)
-            print(f"{package_name} already installed")
-        except ImportError:
-            # Package not found, install it
-            print(f"Installing {package_name}...")
-            try:
-                subprocess.check_call([
-                    sys.executable, "-m", "pip", "install", package_name
-                ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                print(f"{package_name} installed successfully")
-            except subprocess.CalledProcessError as e:
-                print(f"Failed to install {package_name}: {e}")
-                print(f"   Please manually run: pip install {package_name}")
-    
+            subprocess.check_call([
+                sys.executable, "-m", "pip", "install", package_name
+            ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            print(f"{package_name} installed successfully")
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to install {package_name}: {e}")
+            print(f"   Please manually run: pip install {package_name}")
+    
+    # Make freshly installed packages visible to the imports below
+    importlib.invalidate_caches()
     print("Dependency setup complete!")
 
-# Install dependencies before importing other modules
-install_dependencies()
+# Install dependencies before importing other modules, but only when something is missing.
+# Set TRAVEL_BUDDY_SKIP_DEPCHECK to skip the probe entirely in managed environments.
+if not os.getenv("TRAVEL_BUDDY_SKIP_DEPCHECK") and _missing_dependencies():
+    install_dependencies()
 
 # ============ API KEY MANAGEMENT ============
 
@@ -66,44 +99,642 @@ _set_env("BOOKING_API_KEY")
 _set_env("TRIPADVISOR_API_KEY")
 _set_env("GETYOURGUIDE_API_KEY")
 
-# Import LangChain modules after installation
+# Snapshot of the API keys so client construction doesn't re-read the environment
+_ENV = {
+    var: os.getenv(var, "")
+    for var in (
+        "AMADEUS_API_KEY", "AMADEUS_API_SECRET", "BOOKING_API_KEY",
+        "TRIPADVISOR_API_KEY", "GETYOURGUIDE_API_KEY", "OPENAI_API_KEY"
+    )
+}
+
+# Run tracing/callback handlers off the hot path so they never delay streamed tokens
+os.environ.setdefault("LANGCHAIN_CALLBACKS_BACKGROUND", "true")
+
+# Import LangChain modules after installation. Only what module-level definitions need is
+# imported here; the OpenAI client stack is loaded on first use in get_model().
 try:
+    import orjson
+    from travel_buddy_cache import cached_json
     from langchain_core.tools import tool
-    from langchain_core.messages import AIMessage
-    # from langchain_anthropic import ChatAnthropic
-    from langchain_openai import ChatOpenAI
     from langgraph.prebuilt import create_react_agent
-    from langgraph.graph import add_messages
     from langgraph.func import entrypoint, task
-    from langchain_core.messages import convert_to_messages
+    from pydantic import BaseModel, Field
     print("LangChain modules imported successfully")
 except ImportError as e:
     print(f"Error importing LangChain modules: {e}")
     print("Please ensure all packages are installed correctly.")
     sys.exit(1)
 
-# Initialize the model
-model = ChatOpenAI(
-    model="gpt-4o-mini",
-    timeout=60,
-    temperature=0.7
-)
+# Shared by every _build_once getter. Reentrant because getters build on each other
+# (an agent getter calls get_model()).
+_BUILD_LOCK = threading.RLock()
+
+def _build_once(factory):
+    """Cache a zero-argument factory's result, building it at most once even when threads race.
+    
+    lru_cache alone lets two threads (e.g. the startup warm-up and the main thread) both
+    run the factory on a miss, wasting a model client or agent build.
+    """
+    cached = functools.lru_cache(maxsize=None)(factory)
+    
+    @functools.wraps(factory)
+    def getter():
+        with _BUILD_LOCK:
+            return cached()
+    
+    getter.cache_clear = cached.cache_clear
+    return getter
+
+@_build_once
+def get_model():
+    """Return the shared chat model, importing and constructing it on first use"""
+    # from langchain_anthropic import ChatAnthropic
+    from langchain_openai import ChatOpenAI
+    
+    # One client (and one connection pool) for every agent; per-agent variants are derived from it.
+    # SDK retries are off because _invoke_llm owns the retry policy under the concurrency cap.
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        timeout=60,
+        temperature=0.7,
+        max_retries=0
+    )
+
+@_build_once
+def get_deterministic_model():
+    """Temperature-0 variant of the shared chat model for extraction-style calls"""
+    # model_copy is shallow, so the variant reuses the shared model's SDK and HTTP clients
+    return get_model().model_copy(update={"temperature": 0})
+
+# ============ DATE HELPERS ============
+
+@functools.lru_cache(maxsize=256)
+def _parse_date(date_str: str) -> date:
+    """Parse a YYYY-MM-DD date, memoized since a session only sees a handful of dates"""
+    try:
+        # date.fromisoformat is implemented in C and skips strptime's format interpreter
+        return date.fromisoformat(date_str)
+    except ValueError:
+        # strptime also accepts unpadded months/days such as 2025-1-8
+        return datetime.strptime(date_str, "%Y-%m-%d").date()
+
+def _nights_between(checkin_date: str, checkout_date: str) -> int:
+    """Number of nights between two YYYY-MM-DD dates"""
+    return _parse_date(checkout_date).toordinal() - _parse_date(checkin_date).toordinal()
+
+# ============ FORMATTING HELPERS ============
+
+# Shared read-only stand-in for missing nested objects, so lookups don't allocate a fresh {} per miss
+_EMPTY = MappingProxyType({})
+
+def _price_category(price_per_night: float) -> str:
+    """Hotel category label for a nightly price"""
+    if price_per_night > 200:
+        return "luxury"
+    if price_per_night > 100:
+        return "mid-range"
+    return "budget"
+
+class HotelRecord(NamedTuple):
+    """A formatted hotel search result; converted to a dict only when returned from a tool"""
+    name: str
+    rating: float
+    price_per_night: float
+    total_cost: float
+    location: str
+    amenities: List[str]
+    category: str
+    booking_url: str
+    hotel_id: str
+
+class ActivityRecord(NamedTuple):
+    """A formatted activity search result; converted to a dict only when returned from a tool"""
+    name: str
+    description: str
+    category: str
+    duration: str
+    price: float
+    rating: float
+    location: str
+    website: str
+    activity_id: str
+
+# ============ DUMMY DATA ============
+
+# Static payloads for partner-only APIs, built once at import. Callers treat them as read-only.
+
+_DUMMY_HOTELS_TEMPLATE = [
+    {
+        "hotel_name": "Grand Central Hotel",
+        "review_score": 8.5,
+        "nightly_rate": 120,
+        "district": "City Center",
+        "hotel_facilities": ["WiFi", "Restaurant", "Gym", "Pool"],
+        "url": "https://booking.com/hotel1",
+        "hotel_id": "dummy_hotel_1"
+    },
+    {
+        "hotel_name": "Luxury Palace Hotel",
+        "review_score": 9.2,
+        "nightly_rate": 280,
+        "district": "Downtown",
+        "hotel_facilities": ["WiFi", "Spa", "Restaurant", "Gym", "Pool", "Concierge"],
+        "url": "https://booking.com/hotel2",
+        "hotel_id": "dummy_hotel_2"
+    },
+    {
+        "hotel_name": "Budget Comfort Inn",
+        "review_score": 7.8,
+        "nightly_rate": 65,
+        "district": "Suburb",
+        "hotel_facilities": ["WiFi", "Parking"],
+        "url": "https://booking.com/hotel3",
+        "hotel_id": "dummy_hotel_3"
+    },
+    {
+        "hotel_name": "Boutique Design Hotel",
+        "review_score": 8.9,
+        "nightly_rate": 180,
+        "district": "Arts District",
+        "hotel_facilities": ["WiFi", "Restaurant", "Bar", "Rooftop Terrace"],
+        "url": "https://booking.com/hotel4",
+        "hotel_id": "dummy_hotel_4"
+    }
+]
+
+@functools.lru_cache(maxsize=64)
+def _dummy_hotels_for_nights(nights: int) -> Dict:
+    """Build the dummy Booking.com hotel payload priced for a stay of the given length"""
+    return {
+        "result": [
+            {
+                **{key: value for key, value in hotel.items() if key != "nightly_rate"},
+                "min_total_price": hotel["nightly_rate"] * nights
+            }
+            for hotel in _DUMMY_HOTELS_TEMPLATE
+        ]
+    }
+
+def _build_mock_hotels(budget_per_night: float, nights: int) -> List[Dict]:
+    """Format the dummy hotels the way the search tool does, keeping those within the nightly budget"""
+    return [
+        {
+            "name": hotel["hotel_name"],
+            "rating": hotel["review_score"],
+            "price_per_night": float(hotel["nightly_rate"]),
+            "total_cost": float(hotel["nightly_rate"] * nights),
+            "location": hotel["district"],
+            "amenities": hotel["hotel_facilities"],
+            "category": _price_category(hotel["nightly_rate"]),
+            "booking_url": hotel["url"],
+            "hotel_id": hotel["hotel_id"]
+        }
+        for hotel in _DUMMY_HOTELS_TEMPLATE
+        if hotel["nightly_rate"] <= budget_per_night
+    ]
+
+_DUMMY_LOCATION = {
+    "data": [{"location_id": "12345"}]
+}
+
+_DUMMY_ATTRACTIONS = {
+    "data": [
+        {
+            "name": "Historic City Museum",
+            "description": "Explore the rich history and culture of the city through fascinating exhibits and artifacts spanning centuries of local heritage.",
+            "category": {"name": "museum"},
+            "rating": 4.3,
+            "address_obj": {"address_string": "123 Main Street, Downtown"},
+            "website": "https://citymuseum.com",
+            "location_id": "attraction_1"
+        },
+        {
+            "name": "Central Food Market",
+            "description": "Vibrant local market featuring fresh produce, artisanal foods, and traditional culinary specialties from the region.",
+            "category": {"name": "food"},
+            "rating": 4.6,
+            "address_obj": {"address_string": "456 Market Square"},
+            "website": "https://centralmarket.com",
+            "location_id": "attraction_2"
+        },
+        {
+            "name": "Adventure Park & Trails",
+            "description": "Outdoor adventure destination with hiking trails, zip lines, and climbing walls suitable for all skill levels.",
+            "category": {"name": "outdoor"},
+            "rating": 4.4,
+            "address_obj": {"address_string": "789 Nature Valley"},
+            "website": "https://adventurepark.com",
+            "location_id": "attraction_3"
+        },
+        {
+            "name": "Spa & Wellness Center",
+            "description": "Luxurious relaxation facility offering massages, thermal baths, and wellness treatments in a serene environment.",
+            "category": {"name": "spa"},
+            "rating": 4.7,
+            "address_obj": {"address_string": "321 Wellness Way"},
+            "website": "https://spaluxury.com",
+            "location_id": "attraction_4"
+        },
+        {
+            "name": "Historic Cathedral",
+            "description": "Magnificent medieval cathedral featuring stunning architecture, religious art, and guided tours of the bell tower.",
+            "category": {"name": "historic"},
+            "rating": 4.5,
+            "address_obj": {"address_string": "100 Cathedral Square"},
+            "website": "https://cathedral.com",
+            "location_id": "attraction_5"
+        }
+    ]
+}
+
+_DUMMY_ACTIVITIES_BY_CATEGORY = {
+    "culture": (
+        {
+            "title": "Guided Historical Walking Tour",
+            "description": "Discover the city's fascinating history with a knowledgeable local guide. Visit iconic landmarks and hear captivating stories from the past.",
+            "price": {"amount": 25.0},
+            "duration": "2.5 hours",
+            "rating": 4.4,
+            "location": "Historic District",
+            "booking_url": "https://tours.com/historical-tour",
+            "id": "culture_activity_1"
+        },
+        {
+            "title": "Art Gallery & Museum Combo Tour",
+            "description": "Explore renowned art collections and cultural exhibits with skip-the-line access and expert commentary.",
+            "price": {"amount": 35.0},
+            "duration": "3 hours",
+            "rating": 4.6,
+            "location": "Arts Quarter",
+            "booking_url": "https://tours.com/art-tour",
+            "id": "culture_activity_2"
+        }
+    ),
+    "food": (
+        {
+            "title": "Local Food & Wine Tasting Tour",
+            "description": "Savor authentic local cuisine and regional wines at hidden gems known only to locals. Includes 5 tastings.",
+            "price": {"amount": 55.0},
+            "duration": "3.5 hours",
+            "rating": 4.8,
+            "location": "Food District",
+            "booking_url": "https://tours.com/food-tour",
+            "id": "food_activity_1"
+        },
+        {
+            "title": "Cooking Class with Local Chef",
+            "description": "Learn to prepare traditional dishes with a professional chef. Take home recipes and new culinary skills.",
+            "price": {"amount": 75.0},
+            "duration": "4 hours",
+            "rating": 4.7,
+            "location": "Culinary School",
+            "booking_url": "https://tours.com/cooking-class",
+            "id": "food_activity_2"
+        }
+    ),
+    "adventure": (
+        {
+            "title": "City Bike Adventure Tour",
+            "description": "Explore the city's best sights on two wheels with scenic routes and photo stops at major attractions.",
+            "price": {"amount": 45.0},
+            "duration": "4 hours",
+            "rating": 4.3,
+            "location": "Various Locations",
+            "booking_url": "https://tours.com/bike-tour",
+            "id": "adventure_activity_1"
+        },
+        {
+            "title": "Rock Climbing & Rappelling Experience",
+            "description": "Challenge yourself with guided rock climbing suitable for beginners and experienced climbers alike.",
+            "price": {"amount": 85.0},
+            "duration": "5 hours",
+            "rating": 4.5,
+            "location": "Natural Rock Formations",
+            "booking_url": "https://tours.com/climbing",
+            "id": "adventure_activity_2"
+        }
+    ),
+    "relaxation": (
+        {
+            "title": "Spa Day with Thermal Baths",
+            "description": "Unwind in natural thermal waters with access to saunas, steam rooms, and relaxation areas.",
+            "price": {"amount": 65.0},
+            "duration": "6 hours",
+            "rating": 4.6,
+            "location": "Thermal Springs Resort",
+            "booking_url": "https://tours.com/spa-day",
+            "id": "relaxation_activity_1"
+        },
+        {
+            "title": "Sunset Cruise with Dinner",
+            "description": "Enjoy a peaceful evening cruise with gourmet dinner and stunning views as the sun sets over the water.",
+            "price": {"amount": 95.0},
+            "duration": "3 hours",
+            "rating": 4.9,
+            "location": "Marina",
+            "booking_url": "https://tours.com/sunset-cruise",
+            "id": "relaxation_activity_2"
+        }
+    )
+}
+
+_DUMMY_ACTIVITIES_ALL = {"data": tuple(itertools.chain.from_iterable(_DUMMY_ACTIVITIES_BY_CATEGORY.values()))}
+
+# Ready-made response payloads per category, so lookups don't allocate a wrapper dict
+_DUMMY_ACTIVITY_PAYLOADS = {
+    category: {"data": activities} for category, activities in _DUMMY_ACTIVITIES_BY_CATEGORY.items()
+}
+
+# ============ RESPONSE CACHING ============
+
+class CacheEntry:
+    """A cached value together with when it was stored and how long it stays valid"""
+    __slots__ = ("value", "timestamp", "ttl")
+    
+    def __init__(self, value: Any, timestamp: float, ttl: float):
+        self.value = value
+        self.timestamp = timestamp
+        self.ttl = ttl
+    
+    def is_expired(self) -> bool:
+        return time.monotonic() - self.timestamp >= self.ttl
+
+class TTLCache:
+    """Thread-safe in-memory cache whose entries expire after a fixed time-to-live"""
+    
+    def __init__(self, maxsize: int = 256, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self._lock = threading.RLock()
+    
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            if entry.is_expired():
+                del self._entries[key]
+                return default
+            return entry.value
+    
+    def set(self, key, value):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                # Dicts keep insertion order, so the first keys are the oldest entries;
+                # drop the oldest 10% at once rather than evicting on every insert
+                for stale_key in list(itertools.islice(self._entries, max(1, self.maxsize // 10))):
+                    del self._entries[stale_key]
+            self._entries[key] = CacheEntry(value, time.monotonic(), self.ttl)
+
+_MISSING = object()
+
+class Fallback(NamedTuple):
+    """Mock payload a client served because its live API call failed"""
+    payload: Any
+
+def _unwrap_response(response):
+    """Split a client response into (payload, used_fallback)"""
+    if isinstance(response, Fallback):
+        return response.payload, True
+    return response, False
+
+def _cached_response(method):
+    """Serve repeated identical lookups from the API client's TTL cache.
+    
+    Failed calls (None, or a Fallback standing in for the live response) are returned
+    uncached, so the next lookup tries the API again instead of replaying mock data.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = hashlib.md5(repr((method.__name__, args, sorted(kwargs.items()))).encode()).hexdigest()
+        cached = self._cache.get(key, _MISSING)
+        if cached is not _MISSING:
+            return cached
+        
+        result = method(self, *args, **kwargs)
+        if result is not None and not isinstance(result, Fallback):
+            self._cache.set(key, result)
+        return result
+    return wrapper
+
+def tool_memoize(ttl: float = 600, key=None, cache_if=None):
+    """Memoize a tool function for ttl seconds; concurrent identical calls share a single run.
+    
+    key maps the call's arguments to a normalized cache key (the raw arguments by default),
+    and cache_if decides whether a result is worth keeping. Exceptions are never cached.
+    Every caller gets its own deep copy, so mutating a result can't corrupt the cached entry.
+    """
+    def decorator(fn):
+        cache = TTLCache(maxsize=256, ttl=ttl)
+        # Per-key [lock, number of callers using it]; an entry is dropped once its last caller leaves,
+        # so the table only ever holds keys with a call in flight
+        key_locks: Dict[str, list] = {}
+        key_locks_guard = threading.Lock()
+        
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            raw_key = key(*args, **kwargs) if key else (args, sorted(kwargs.items()))
+            cache_key = hashlib.md5(repr(raw_key).encode()).hexdigest()
+            cached = cache.get(cache_key, _MISSING)
+            if cached is not _MISSING:
+                return copy.deepcopy(cached)
+            
+            with key_locks_guard:
+                lock_entry = key_locks.get(cache_key)
+                if lock_entry is None:
+                    lock_entry = key_locks[cache_key] = [threading.Lock(), 0]
+                lock_entry[1] += 1
+            try:
+                with lock_entry[0]:
+                    # Another caller may have filled the entry while we waited for the lock
+                    result = cache.get(cache_key, _MISSING)
+                    if result is _MISSING:
+                        result = fn(*args, **kwargs)
+                        if cache_if is None or cache_if(result):
+                            cache.set(cache_key, result)
+            finally:
+                with key_locks_guard:
+                    lock_entry[1] -= 1
+                    if lock_entry[1] == 0:
+                        del key_locks[cache_key]
+            return copy.deepcopy(result)
+        
+        # Exposed so other cache layers can reuse the same expiry, key and admission rule
+        inner.cache_settings = (ttl, key, cache_if)
+        return inner
+    return decorator
 
 # ============ API CLIENT CLASSES ============
 
+class CircuitBreaker:
+    """Stops calling a provider for reset_timeout seconds after fail_max consecutive failures"""
+    
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 60):
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        with self._lock:
+            # Once the timeout passes, let calls through again; one more failure re-opens it
+            return self._opened_at is None or time.monotonic() - self._opened_at >= self.reset_timeout
+    
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+
+class _BreakerSession(requests.Session):
+    """Session that fails fast while its provider's circuit breaker is open"""
+    
+    def __init__(self):
+        super().__init__()
+        self.breaker = CircuitBreaker()
+    
+    def request(self, method, url, *args, **kwargs):
+        if not self.breaker.allow():
+            # Raised as a RequestException so clients take their usual mock-data fallback
+            raise requests.ConnectionError(f"Circuit open for {url}; skipping call")
+        try:
+            response = super().request(method, url, *args, **kwargs)
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        if response.status_code >= 500 or response.status_code == 429:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return response
+
+def _build_session(headers: Optional[Dict[str, str]] = None) -> requests.Session:
+    """Create a pooled HTTP session that retries throttled and failed requests with backoff"""
+    session = _BreakerSession()
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "POST"],
+        # A throttled provider can ask for minutes via Retry-After; stick to our own short backoff
+        # so a tool thread (possibly holding a memo lock) never sleeps that long before falling back
+        respect_retry_after_header=False
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry))
+    if headers:
+        session.headers.update(headers)
+    return session
+
+# (connect, read) timeouts applied to every outbound API request
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Failure kinds: transient errors (timeouts, 5xx, throttling) may succeed on retry,
+# permanent ones (other 4xx) will fail the same way again
+TRANSIENT_FAIL = "transient"
+PERMANENT_FAIL = "permanent"
+
+def _classify_failure(error: Exception) -> str:
+    """Classify a request error as transient or permanent"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        if 400 <= status < 500 and status not in (408, 429):
+            return PERMANENT_FAIL
+    return TRANSIENT_FAIL
+
+def _decode_json(response: requests.Response):
+    """Decode a JSON response body with orjson, falling back to the requests decoder"""
+    try:
+        return orjson.loads(response.content)
+    except orjson.JSONDecodeError:
+        return response.json()
+
+# Amadeus OAuth tokens are persisted here so fresh processes can skip the token request
+AMADEUS_TOKEN_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "travel_buddy", "amadeus_token.json")
+
 class AmadeusAPI:
+    __slots__ = ("api_key", "api_secret", "base_url", "access_token", "token_expires",
+                 "_auth_headers", "session", "_cache", "credentials_rejected", "use_dummy_data", "_token_lock")
+    
     def __init__(self):
-        self.api_key = os.getenv("AMADEUS_API_KEY")
-        self.api_secret = os.getenv("AMADEUS_API_SECRET")
+        self.api_key = _ENV["AMADEUS_API_KEY"]
+        self.api_secret = _ENV["AMADEUS_API_SECRET"]
+        self.use_dummy_data = (not self.api_key or self.api_key == "0")
         self.base_url = "https://test.api.amadeus.com/v1"  # Use production URL for live
         self.access_token = None
         self.token_expires = None
+        self._auth_headers = None
+        self.session = _build_session()
+        self._cache = TTLCache(maxsize=256, ttl=300)
+        self.credentials_rejected = False
+        # Serializes token refreshes across the pool threads that search Amadeus concurrently
+        self._token_lock = threading.Lock()
+        self._load_cached_token()
+    
+    def _load_cached_token(self):
+        """Restore a previously issued token from disk if it belongs to the current API key"""
+        try:
+            with open(AMADEUS_TOKEN_CACHE) as f:
+                cached = json.load(f)
+            if cached.get("client_id") != self.api_key:
+                return
+            self.access_token = cached["access_token"]
+            self.token_expires = datetime.fromisoformat(cached["expires"])
+            self._auth_headers = {"Authorization": f"Bearer {self.access_token}"}
+        except (OSError, ValueError, KeyError, TypeError):
+            self.access_token = None
+            self.token_expires = None
+            self._auth_headers = None
+    
+    def _save_cached_token(self):
+        """Persist the current token to disk, readable only by the current user"""
+        cache_dir = os.path.dirname(AMADEUS_TOKEN_CACHE)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write a private temp file and swap it in, so other processes never read a half-written token
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=".amadeus_token.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as f:
+                    json.dump({
+                        "client_id": self.api_key,
+                        "access_token": self.access_token,
+                        "expires": self.token_expires.isoformat()
+                    }, f)
+                os.replace(tmp_path, AMADEUS_TOKEN_CACHE)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning("Could not cache Amadeus token: %s", e)
+    
+    def _token_valid(self):
+        """Whether the current token exists and has not expired"""
+        return bool(self.access_token and self.token_expires and datetime.now() < self.token_expires)
     
     def get_access_token(self):
         """Get OAuth2 access token for Amadeus API"""
-        if self.access_token and self.token_expires and datetime.now() < self.token_expires:
+        if self._token_valid():
             return self.access_token
+        if self.use_dummy_data or self.credentials_rejected:
+            return None
         
+        with self._token_lock:
+            # Another thread may have refreshed the token while this one waited
+            if self._token_valid():
+                return self.access_token
+            if self.credentials_rejected:
+                return None
+            return self._refresh_token()
+    
+    def _refresh_token(self):
+        """Request a new token; the caller holds _token_lock"""
         url = "https://test.api.amadeus.com/v1/security/oauth2/token"
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
         data = {
@@ -113,33 +744,53 @@ class AmadeusAPI:
         }
         
         try:
-            response = requests.post(url, headers=headers, data=data)
+            response = self.session.post(url, headers=headers, data=data, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            token_data = response.json()
+            token_data = _decode_json(response)
             
             self.access_token = token_data["access_token"]
             self.token_expires = datetime.now() + timedelta(seconds=token_data["expires_in"] - 60)
+            self._auth_headers = {"Authorization": f"Bearer {self.access_token}"}
+            self._save_cached_token()
             
             return self.access_token
-        except Exception as e:
-            print(f"Error getting Amadeus token: {e}")
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            failure = _classify_failure(e)
+            if failure == PERMANENT_FAIL:
+                # Rejected credentials won't start working on retry; stop asking for tokens
+                self.credentials_rejected = True
+            logger.warning("Error getting Amadeus token (%s): %s", failure, e)
             return None
     
+    def warm_up(self):
+        """Open the pooled TLS connection to Amadeus ahead of the first search"""
+        if self.use_dummy_data or self.credentials_rejected:
+            return
+        if self._token_valid():
+            # Token is still valid, so no token request will open the connection for us
+            try:
+                self.session.head(self.base_url, timeout=REQUEST_TIMEOUT)
+            except requests.RequestException:
+                pass
+        else:
+            self.get_access_token()
+    
     def search_flights(self, origin: str, destination: str, departure_date: str, return_date: Optional[str] = None, adults: int = 1, max_price: Optional[int] = None):
         """Search flights using Amadeus Flight Offers API"""
-        token = self.get_access_token()
-        if not token:
+        if not self.get_access_token():
             return None
         
         url = f"{self.base_url}/shopping/flight-offers"
-        headers = {"Authorization": f"Bearer {token}"}
+        headers = self._auth_headers
         
         params = {
             "originLocationCode": origin,
             "destinationLocationCode": destination, 
             "departureDate": departure_date,
             "adults": adults,
-            "max": 10
+            "currencyCode": "USD",
+            # The tool only keeps three offers, so don't download more
+            "max": 3
         }
         
         if return_date:
@@ -148,21 +799,21 @@ class AmadeusAPI:
             params["maxPrice"] = max_price
         
         try:
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error searching flights: {e}")
+            return _decode_json(response)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error searching flights (%s): %s", _classify_failure(e), e)
             return None
     
+    @_cached_response
     def search_hotels(self, city_code: str, checkin_date: str, checkout_date: str, adults: int = 1, rooms: int = 1):
         """Search hotels using Amadeus Hotel Search API"""
-        token = self.get_access_token()
-        if not token:
+        if not self.get_access_token():
             return None
         
         url = f"{self.base_url}/reference-data/locations/hotels/by-city"
-        headers = {"Authorization": f"Bearer {token}"}
+        headers = self._auth_headers
         
         params = {
             "cityCode": city_code,
@@ -173,36 +824,37 @@ class AmadeusAPI:
         
         try:
             # First get hotel list
-            response = requests.get(url, headers=headers, params=params)
+            response = self.session.get(url, headers=headers, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            hotels_data = response.json()
+            hotels_data = _decode_json(response)
             
             # Then get hotel offers for first few hotels
             if "data" in hotels_data:
-                hotel_ids = [hotel["hotelId"] for hotel in hotels_data["data"][:20]]
-                
                 offers_url = f"{self.base_url}/shopping/hotel-offers"
                 offers_params = {
-                    "hotelIds": ",".join(hotel_ids),
+                    "hotelIds": ",".join(hotel["hotelId"] for hotel in itertools.islice(hotels_data["data"], 20)),
                     "checkInDate": checkin_date,
                     "checkOutDate": checkout_date,
                     "adults": adults,
                     "rooms": rooms
                 }
                 
-                offers_response = requests.get(offers_url, headers=headers, params=offers_params)
+                offers_response = self.session.get(offers_url, headers=headers, params=offers_params, timeout=REQUEST_TIMEOUT)
                 offers_response.raise_for_status()
-                return offers_response.json()
+                return _decode_json(offers_response)
             
             return hotels_data
-        except Exception as e:
-            print(f"Error searching hotels: {e}")
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            logger.warning("Error searching hotels (%s): %s", _classify_failure(e), e)
             return None
 
 class BookingAPI:
+    __slots__ = ("api_key", "use_dummy_data", "_cache", "base_url", "headers", "session")
+    
     def __init__(self):
-        self.api_key = os.getenv("BOOKING_API_KEY")
+        self.api_key = _ENV["BOOKING_API_KEY"]
         self.use_dummy_data = (not self.api_key or self.api_key == "0")
+        self._cache = TTLCache(maxsize=256, ttl=300)
         
         if not self.use_dummy_data:
             self.base_url = "https://booking-com.p.rapidapi.com/v1"
@@ -210,7 +862,9 @@ class BookingAPI:
                 "X-RapidAPI-Key": self.api_key,
                 "X-RapidAPI-Host": "booking-com.p.rapidapi.com"
             }
+            self.session = _build_session(self.headers)
     
+    @_cached_response
     def search_locations(self, query: str):
         """Search for location IDs"""
         if self.use_dummy_data:
@@ -220,13 +874,14 @@ class BookingAPI:
         params = {"name": query, "locale": "en-gb"}
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error searching locations: {e}")
-            return self._get_dummy_locations(query)
+            return _decode_json(response)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error searching locations (%s): %s", _classify_failure(e), e)
+            return Fallback(self._get_dummy_locations(query))
     
+    @_cached_response
     def search_hotels(self, dest_id: str, checkin_date: str, checkout_date: str, adults: int = 1, rooms: int = 1):
         """Search hotels using Booking.com API"""
         if self.use_dummy_data:
@@ -246,12 +901,12 @@ class BookingAPI:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error searching hotels: {e}")
-            return self._get_dummy_hotels(checkin_date, checkout_date)
+            return _decode_json(response)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error searching hotels (%s): %s", _classify_failure(e), e)
+            return Fallback(self._get_dummy_hotels(checkin_date, checkout_date))
     
     def _get_dummy_locations(self, query: str):
         """Return dummy location data"""
@@ -259,60 +914,25 @@ class BookingAPI:
     
     def _get_dummy_hotels(self, checkin_date: str, checkout_date: str):
         """Return dummy hotel data"""
-        checkin = datetime.strptime(checkin_date, "%Y-%m-%d")
-        checkout = datetime.strptime(checkout_date, "%Y-%m-%d")
-        nights = (checkout - checkin).days
+        nights = _nights_between(checkin_date, checkout_date)
         
-        return {
-            "result": [
-                {
-                    "hotel_name": "Grand Central Hotel",
-                    "review_score": 8.5,
-                    "min_total_price": 120 * nights,
-                    "district": "City Center",
-                    "hotel_facilities": ["WiFi", "Restaurant", "Gym", "Pool"],
-                    "url": "https://booking.com/hotel1",
-                    "hotel_id": "dummy_hotel_1"
-                },
-                {
-                    "hotel_name": "Luxury Palace Hotel",
-                    "review_score": 9.2,
-                    "min_total_price": 280 * nights,
-                    "district": "Downtown",
-                    "hotel_facilities": ["WiFi", "Spa", "Restaurant", "Gym", "Pool", "Concierge"],
-                    "url": "https://booking.com/hotel2",
-                    "hotel_id": "dummy_hotel_2"
-                },
-                {
-                    "hotel_name": "Budget Comfort Inn",
-                    "review_score": 7.8,
-                    "min_total_price": 65 * nights,
-                    "district": "Suburb",
-                    "hotel_facilities": ["WiFi", "Parking"],
-                    "url": "https://booking.com/hotel3",
-                    "hotel_id": "dummy_hotel_3"
-                },
-                {
-                    "hotel_name": "Boutique Design Hotel",
-                    "review_score": 8.9,
-                    "min_total_price": 180 * nights,
-                    "district": "Arts District",
-                    "hotel_facilities": ["WiFi", "Restaurant", "Bar", "Rooftop Terrace"],
-                    "url": "https://booking.com/hotel4",
-                    "hotel_id": "dummy_hotel_4"
-                }
-            ]
-        }
+        return _dummy_hotels_for_nights(nights)
 
 class TripAdvisorAPI:
+    __slots__ = ("api_key", "use_dummy_data", "_cache", "base_url", "headers", "session")
+    
     def __init__(self):
-        self.api_key = os.getenv("TRIPADVISOR_API_KEY")
+        self.api_key = _ENV["TRIPADVISOR_API_KEY"]
         self.use_dummy_data = (not self.api_key or self.api_key == "0")
+        # Attraction and activity listings change slowly, so they can be kept longer than prices
+        self._cache = TTLCache(maxsize=500, ttl=1800)
         
         if not self.use_dummy_data:
             self.base_url = "https://api.content.tripadvisor.com/api/v1"
             self.headers = {"accept": "application/json"}
+            self.session = _build_session(self.headers)
     
+    @_cached_response
     def search_location(self, query: str):
         """Search for location ID"""
         if self.use_dummy_data:
@@ -326,13 +946,14 @@ class TripAdvisorAPI:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error searching location: {e}")
-            return self._get_dummy_location(query)
+            return _decode_json(response)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error searching location (%s): %s", _classify_failure(e), e)
+            return Fallback(self._get_dummy_location(query))
     
+    @_cached_response
     def get_attractions(self, location_id: str):
         """Get attractions for a location"""
         if self.use_dummy_data:
@@ -345,80 +966,36 @@ class TripAdvisorAPI:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error getting attractions: {e}")
-            return self._get_dummy_attractions()
+            return _decode_json(response)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error getting attractions (%s): %s", _classify_failure(e), e)
+            return Fallback(self._get_dummy_attractions())
     
     def _get_dummy_location(self, query: str):
         """Return dummy location data"""
-        return {
-            "data": [{"location_id": "12345"}]
-        }
+        return _DUMMY_LOCATION
     
     def _get_dummy_attractions(self):
         """Return dummy attractions data"""
-        return {
-            "data": [
-                {
-                    "name": "Historic City Museum",
-                    "description": "Explore the rich history and culture of the city through fascinating exhibits and artifacts spanning centuries of local heritage.",
-                    "category": {"name": "museum"},
-                    "rating": 4.3,
-                    "address_obj": {"address_string": "123 Main Street, Downtown"},
-                    "website": "https://citymuseum.com",
-                    "location_id": "attraction_1"
-                },
-                {
-                    "name": "Central Food Market",
-                    "description": "Vibrant local market featuring fresh produce, artisanal foods, and traditional culinary specialties from the region.",
-                    "category": {"name": "food"},
-                    "rating": 4.6,
-                    "address_obj": {"address_string": "456 Market Square"},
-                    "website": "https://centralmarket.com",
-                    "location_id": "attraction_2"
-                },
-                {
-                    "name": "Adventure Park & Trails",
-                    "description": "Outdoor adventure destination with hiking trails, zip lines, and climbing walls suitable for all skill levels.",
-                    "category": {"name": "outdoor"},
-                    "rating": 4.4,
-                    "address_obj": {"address_string": "789 Nature Valley"},
-                    "website": "https://adventurepark.com",
-                    "location_id": "attraction_3"
-                },
-                {
-                    "name": "Spa & Wellness Center",
-                    "description": "Luxurious relaxation facility offering massages, thermal baths, and wellness treatments in a serene environment.",
-                    "category": {"name": "spa"},
-                    "rating": 4.7,
-                    "address_obj": {"address_string": "321 Wellness Way"},
-                    "website": "https://spaluxury.com",
-                    "location_id": "attraction_4"
-                },
-                {
-                    "name": "Historic Cathedral",
-                    "description": "Magnificent medieval cathedral featuring stunning architecture, religious art, and guided tours of the bell tower.",
-                    "category": {"name": "historic"},
-                    "rating": 4.5,
-                    "address_obj": {"address_string": "100 Cathedral Square"},
-                    "website": "https://cathedral.com",
-                    "location_id": "attraction_5"
-                }
-            ]
-        }
+        return _DUMMY_ATTRACTIONS
 
 class GetYourGuideAPI:
+    __slots__ = ("api_key", "use_dummy_data", "_cache", "base_url", "headers", "session")
+    
     def __init__(self):
-        self.api_key = os.getenv("GETYOURGUIDE_API_KEY")
+        self.api_key = _ENV["GETYOURGUIDE_API_KEY"]
         self.use_dummy_data = (not self.api_key or self.api_key == "0")
+        # Attraction and activity listings change slowly, so they can be kept longer than prices
+        self._cache = TTLCache(maxsize=500, ttl=1800)
         
         if not self.use_dummy_data:
             self.base_url = "https://api.getyourguide.com/v1"
             self.headers = {"Authorization": f"Bearer {self.api_key}"}
+            self.session = _build_session(self.headers)
     
+    @_cached_response
     def search_activities(self, location: str, category: Optional[str] = None):
         """Search activities and tours"""
         if self.use_dummy_data:
@@ -434,113 +1011,16 @@ class GetYourGuideAPI:
             params["category"] = category
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            print(f"Error searching activities: {e}")
-            return self._get_dummy_activities(category)
+            return _decode_json(response)
+        except (requests.RequestException, ValueError) as e:
+            logger.warning("Error searching activities (%s): %s", _classify_failure(e), e)
+            return Fallback(self._get_dummy_activities(category))
     
     def _get_dummy_activities(self, category: Optional[str] = None):
         """Return dummy activity data"""
-        activities = {
-            "culture": [
-                {
-                    "title": "Guided Historical Walking Tour",
-                    "description": "Discover the city's fascinating history with a knowledgeable local guide. Visit iconic landmarks and hear captivating stories from the past.",
-                    "price": {"amount": 25.0},
-                    "duration": "2.5 hours",
-                    "rating": 4.4,
-                    "location": "Historic District",
-                    "booking_url": "https://tours.com/historical-tour",
-                    "id": "culture_activity_1"
-                },
-                {
-                    "title": "Art Gallery & Museum Combo Tour",
-                    "description": "Explore renowned art collections and cultural exhibits with skip-the-line access and expert commentary.",
-                    "price": {"amount": 35.0},
-                    "duration": "3 hours",
-                    "rating": 4.6,
-                    "location": "Arts Quarter",
-                    "booking_url": "https://tours.com/art-tour",
-                    "id": "culture_activity_2"
-                }
-            ],
-            "food": [
-                {
-                    "title": "Local Food & Wine Tasting Tour",
-                    "description": "Savor authentic local cuisine and regional wines at hidden gems known only to locals. Includes 5 tastings.",
-                    "price": {"amount": 55.0},
-                    "duration": "3.5 hours",
-                    "rating": 4.8,
-                    "location": "Food District",
-                    "booking_url": "https://tours.com/food-tour",
-                    "id": "food_activity_1"
-                },
-                {
-                    "title": "Cooking Class with Local Chef",
-                    "description": "Learn to prepare traditional dishes with a professional chef. Take home recipes and new culinary skills.",
-                    "price": {"amount": 75.0},
-                    "duration": "4 hours",
-                    "rating": 4.7,
-                    "location": "Culinary School",
-                    "booking_url": "https://tours.com/cooking-class",
-                    "id": "food_activity_2"
-                }
-            ],
-            "adventure": [
-                {
-                    "title": "City Bike Adventure Tour",
-                    "description": "Explore the city's best sights on two wheels with scenic routes and photo stops at major attractions.",
-                    "price": {"amount": 45.0},
-                    "duration": "4 hours",
-                    "rating": 4.3,
-                    "location": "Various Locations",
-                    "booking_url": "https://tours.com/bike-tour",
-                    "id": "adventure_activity_1"
-                },
-                {
-                    "title": "Rock Climbing & Rappelling Experience",
-                    "description": "Challenge yourself with guided rock climbing suitable for beginners and experienced climbers alike.",
-                    "price": {"amount": 85.0},
-                    "duration": "5 hours",
-                    "rating": 4.5,
-                    "location": "Natural Rock Formations",
-                    "booking_url": "https://tours.com/climbing",
-                    "id": "adventure_activity_2"
-                }
-            ],
-            "relaxation": [
-                {
-                    "title": "Spa Day with Thermal Baths",
-                    "description": "Unwind in natural thermal waters with access to saunas, steam rooms, and relaxation areas.",
-                    "price": {"amount": 65.0},
-                    "duration": "6 hours",
-                    "rating": 4.6,
-                    "location": "Thermal Springs Resort",
-                    "booking_url": "https://tours.com/spa-day",
-                    "id": "relaxation_activity_1"
-                },
-                {
-                    "title": "Sunset Cruise with Dinner",
-                    "description": "Enjoy a peaceful evening cruise with gourmet dinner and stunning views as the sun sets over the water.",
-                    "price": {"amount": 95.0},
-                    "duration": "3 hours",
-                    "rating": 4.9,
-                    "location": "Marina",
-                    "booking_url": "https://tours.com/sunset-cruise",
-                    "id": "relaxation_activity_2"
-                }
-            ]
-        }
-        
-        if category and category in activities:
-            return {"data": activities[category]}
-        else:
-            all_activities = []
-            for cat_activities in activities.values():
-                all_activities.extend(cat_activities)
-            return {"data": all_activities}
+        return _DUMMY_ACTIVITY_PAYLOADS.get(category, _DUMMY_ACTIVITIES_ALL)
 
 # Initialize API clients
 amadeus_api = AmadeusAPI()
@@ -548,9 +1028,177 @@ booking_api = BookingAPI()
 tripadvisor_api = TripAdvisorAPI()
 getyourguide_api = GetYourGuideAPI()
 
+# With no real hotel API configured, every hotel search would end in the same mock data
+_ALL_DUMMY_HOTELS = booking_api.use_dummy_data and amadeus_api.use_dummy_data
+
+# Shared worker pool for running independent, I/O-bound API calls concurrently
+_API_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="travel_buddy_api")
+
+def warm_up_api_connections():
+    """Start connection setup in the background so the first search skips the TCP/TLS handshake"""
+    _API_POOL.submit(amadeus_api.warm_up)
+
+def _prefetch_tripadvisor(destination: str):
+    location_data, _ = _unwrap_response(tripadvisor_api.search_location(destination))
+    if location_data and "data" in location_data:
+        location_id = location_data["data"][0].get("location_id")
+        if location_id:
+            tripadvisor_api.get_attractions(location_id)
+
+def prefetch_destination_lookups(destination: str):
+    """Warm the client caches for lookups that depend only on the destination.
+    
+    The hotel and activity searches start with these same calls, so once the trip search
+    runs they are served from cache.
+    """
+    _API_POOL.submit(booking_api.search_locations, destination)
+    _API_POOL.submit(_prefetch_tripadvisor, destination)
+
 # ============ ENHANCED TRAVEL SEARCH TOOLS ============
 
+# City name -> IATA airport/city code lookups, keyed on lower-cased city names
+AIRPORT_CODES = {
+    "new york": "NYC", "paris": "PAR", "london": "LON", "tokyo": "TYO",
+    "los angeles": "LAX", "rome": "ROM", "barcelona": "BCN", "madrid": "MAD",
+    "amsterdam": "AMS", "berlin": "BER", "sydney": "SYD", "dubai": "DXB"
+}
+
+CITY_CODES = {"paris": "PAR", "london": "LON", "new york": "NYC", "tokyo": "TYO"}
+
+# TripAdvisor category keyword -> our activity category, checked in priority order
+CATEGORY_KEYWORDS = {
+    "museum": "culture", "historic": "culture", "cultural": "culture",
+    "food": "food", "restaurant": "food", "culinary": "food",
+    "adventure": "adventure", "outdoor": "adventure", "sports": "adventure",
+    "spa": "relaxation", "beach": "relaxation", "relaxation": "relaxation"
+}
+
+# Estimated per-person price of a TripAdvisor attraction by category
+ACTIVITY_PRICE_ESTIMATES = {
+    "culture": 25.0,
+    "food": 45.0, 
+    "adventure": 65.0,
+    "relaxation": 35.0
+}
+
+# C-level sort keys for fields that are always present on records we built ourselves
+_by_rating = attrgetter("rating")
+
+# Tool memo keys, normalized the way each tool normalizes its own arguments so equivalent calls share an entry
+
+def _flight_search_key(departure_city: str, destination: str, departure_date: str, return_date: Optional[str] = None,
+                       travelers: int = 1, budget_per_person: float = 1000.0):
+    return ((departure_city or "").strip().lower(), (destination or "").strip().lower(), departure_date,
+            return_date if return_date and return_date.lower() != "none" else None,
+            int(travelers) if travelers else 1, float(budget_per_person) if budget_per_person else 1000.0)
+
+def _hotel_search_key(destination: str, checkin_date: str, checkout_date: str,
+                      budget_per_night: float, travelers: int = 1, accommodation_type: str = "hotel"):
+    # accommodation_type doesn't influence the search, so it stays out of the key
+    return ((destination or "").strip().lower(), checkin_date, checkout_date,
+            float(budget_per_night) if budget_per_night else 200.0, int(travelers) if travelers else 1)
+
+def _activity_search_key(destination: str, activity_preferences: List[str],
+                         daily_activity_budget: float, trip_duration_days: int):
+    # Preference order matters: only the first two are searched on GetYourGuide
+    return ((destination or "").strip().lower(), tuple(activity_preferences or ()),
+            float(daily_activity_budget) if daily_activity_budget else 100.0,
+            int(trip_duration_days) if trip_duration_days else 7)
+
+def _has_live_flights(result: Dict) -> bool:
+    """Mock flights stand in for a failed or skipped Amadeus search and shouldn't outlive it"""
+    flights = result["flights"]
+    return bool(flights) and not flights[0]["booking_token"].startswith("mock_token")
+
+def _has_live_data(result: Dict) -> bool:
+    """Results padded with mock data after a failed API call shouldn't outlive the failure"""
+    return not result.get("used_fallback", False)
+
+def _search_booking_hotels(destination: str, checkin_date: str, checkout_date: str,
+                           travelers: int, nights: int, budget_per_night: float) -> Tuple[List[HotelRecord], bool]:
+    """Search Booking.com for hotels within the nightly budget; also reports whether mock data filled in for a failed call"""
+    formatted_hotels = []
+    
+    location_data, used_fallback = _unwrap_response(booking_api.search_locations(destination))
+    if location_data and len(location_data) > 0:
+        dest_id = location_data[0].get("dest_id")
+        if dest_id:
+            hotel_data, hotels_fallback = _unwrap_response(booking_api.search_hotels(
+                dest_id=str(dest_id),
+                checkin_date=checkin_date,
+                checkout_date=checkout_date,
+                adults=travelers
+            ))
+            used_fallback = used_fallback or hotels_fallback
+            
+            if hotel_data and "result" in hotel_data:
+                for hotel in hotel_data["result"][:10]:  
+                    try:
+                        price_per_night = float(hotel.get("min_total_price", 0)) / nights
+                        
+                        if price_per_night <= budget_per_night:
+                            formatted_hotels.append(HotelRecord(
+                                name=hotel.get("hotel_name", "Unknown Hotel"),
+                                rating=float(hotel.get("review_score", 3.0)),
+                                price_per_night=price_per_night,
+                                total_cost=price_per_night * nights,
+                                location=hotel.get("district", "City Center"),
+                                amenities=hotel.get("hotel_facilities", ["WiFi"]),
+                                category=_price_category(price_per_night),
+                                booking_url=hotel.get("url", ""),
+                                hotel_id=hotel.get("hotel_id", "")
+                            ))
+                    except (KeyError, ValueError, TypeError) as e:
+                        logger.warning("Error parsing hotel data: %s", e)
+                        continue
+    
+    return formatted_hotels, used_fallback
+
+def _search_amadeus_hotels(destination: str, checkin_date: str, checkout_date: str,
+                           travelers: int, nights: int, budget_per_night: float) -> Tuple[List[HotelRecord], bool]:
+    """Search Amadeus for hotels within the nightly budget; Amadeus never substitutes mock data"""
+    formatted_hotels = []
+    
+    city_code = CITY_CODES.get(destination.strip().lower(), "PAR")
+    
+    hotel_data = amadeus_api.search_hotels(
+        city_code=city_code,
+        checkin_date=checkin_date,
+        checkout_date=checkout_date,
+        adults=travelers
+    )
+    
+    if hotel_data and "data" in hotel_data:
+        for hotel_offer in hotel_data["data"][:5]:
+            try:
+                hotel_info = hotel_offer.get("hotel") or _EMPTY
+                offers = hotel_offer.get("offers", [])
+                
+                if offers:
+                    price_info = offers[0].get("price") or _EMPTY
+                    total_price = float(price_info.get("total", 0))
+                    price_per_night = total_price / nights
+                    
+                    if price_per_night <= budget_per_night:
+                        formatted_hotels.append(HotelRecord(
+                            name=hotel_info.get("name", "Unknown Hotel"),
+                            rating=float(hotel_info.get("rating", 3.5)),
+                            price_per_night=price_per_night,
+                            total_cost=total_price,
+                            location=(hotel_info.get("address") or _EMPTY).get("cityName", "City Center"),
+                            amenities=hotel_info.get("amenities", ["WiFi"]),
+                            category=_price_category(price_per_night),
+                            booking_url="",
+                            hotel_id=hotel_info.get("hotelId", "")
+                        ))
+            except (KeyError, ValueError, TypeError) as e:
+                logger.warning("Error parsing Amadeus hotel data: %s", e)
+                continue
+    
+    return formatted_hotels, False
+
 @tool
+@tool_memoize(ttl=600, key=_flight_search_key, cache_if=_has_live_flights)
 def search_flights(departure_city: str, destination: str, departure_date: str, return_date: Optional[str] = None, 
                   travelers: int = 1, budget_per_person: float = 1000.0):
     """Search for flights using real flight APIs (Amadeus)."""
@@ -561,64 +1209,60 @@ def search_flights(departure_city: str, destination: str, departure_date: str, r
     travelers = int(travelers) if travelers else 1
     budget_per_person = float(budget_per_person) if budget_per_person else 1000.0
     
-    print(f"Searching real flights from {departure_city} to {destination} on {departure_date}")
+    logger.info("Searching real flights from %s to %s on %s", departure_city, destination, departure_date)
     
-    airport_codes = {
-        "new york": "NYC", "paris": "PAR", "london": "LON", "tokyo": "TYO",
-        "los angeles": "LAX", "rome": "ROM", "barcelona": "BCN", "madrid": "MAD",
-        "amsterdam": "AMS", "berlin": "BER", "sydney": "SYD", "dubai": "DXB"
-    }
+    origin_code = AIRPORT_CODES.get(departure_city.strip().lower())
+    dest_code = AIRPORT_CODES.get(destination.strip().lower())
     
-    origin_code = airport_codes.get(departure_city.lower(), "NYC")
-    dest_code = airport_codes.get(destination.lower(), "PAR")
-    
-    # Search flights using Amadeus API
-    flight_data = amadeus_api.search_flights(
-        origin=origin_code,
-        destination=dest_code,
-        departure_date=departure_date,
-        return_date=return_date,
-        adults=travelers,
-        max_price=int(budget_per_person)
-    )
+    # An unmapped city can't be searched, so go straight to mock data
+    if origin_code is None or dest_code is None:
+        unknown_city = departure_city if origin_code is None else destination
+        logger.warning("Unknown city %s, using mock data", unknown_city)
+        flight_data = None
+    else:
+        # Search flights using Amadeus API
+        flight_data = amadeus_api.search_flights(
+            origin=origin_code,
+            destination=dest_code,
+            departure_date=departure_date,
+            return_date=return_date,
+            adults=travelers,
+            max_price=int(budget_per_person)
+        )
     
     formatted_flights = []
+    append_flight = formatted_flights.append
     
+    # Amadeus already applies maxPrice server-side, so offers are taken as returned
     if flight_data and "data" in flight_data:
-        for offer in flight_data["data"][:5]:  
+        for offer in flight_data["data"][:3]:  
             try:
                 price = float(offer["price"]["total"])
                 
                 # Get flight details from first itinerary
                 itinerary = offer["itineraries"][0]
                 segments = itinerary["segments"]
-                
-                departure_time = segments[0]["departure"]["at"]
-                arrival_time = segments[-1]["arrival"]["at"]
-                duration = itinerary["duration"]
+                first_segment = segments[0]
                 stops = len(segments) - 1
                 
-                # Get airline code
-                airline_code = segments[0]["carrierCode"]
-                
-                formatted_flights.append({
-                    "airline": f"{airline_code} Airlines",
-                    "departure_time": departure_time,
-                    "arrival_time": arrival_time,
+                append_flight({
+                    "airline": f"{first_segment['carrierCode']} Airlines",
+                    "departure_time": first_segment["departure"]["at"],
+                    "arrival_time": segments[-1]["arrival"]["at"],
                     "price": price,
-                    "duration": duration,
+                    "duration": itinerary["duration"],
                     "stops": stops,
                     "rating": 4.0 + (5 - stops) * 0.2,  
                     "booking_token": offer.get("id", "")
                 })
             except (KeyError, ValueError) as e:
-                print(f"Error parsing flight offer: {e}")
+                logger.warning("Error parsing flight offer: %s", e)
                 continue
     
     # Fallback to mock data if API fails
     if not formatted_flights:
-        print("Using mock flight data (API unavailable)")
-        formatted_flights = [
+        logger.warning("Using mock flight data (API unavailable)")
+        mock_flights = [
             {
                 "airline": "Delta Airlines",
                 "departure_time": f"{departure_date}T08:00:00",
@@ -640,11 +1284,11 @@ def search_flights(departure_city: str, destination: str, departure_date: str, r
                 "booking_token": "mock_token_2"
             }
         ]
-    
-    affordable_flights = [f for f in formatted_flights if f["price"] <= budget_per_person]
+        # Mocks ignore maxPrice, so they still need the budget filter
+        formatted_flights = [f for f in mock_flights if f["price"] <= budget_per_person]
     
     return {
-        "flights": affordable_flights[:3],
+        "flights": formatted_flights,
         "search_params": {
             "departure_city": departure_city,
             "destination": destination,
@@ -654,6 +1298,7 @@ def search_flights(departure_city: str, destination: str, departure_date: str, r
     }
 
 @tool
+@tool_memoize(ttl=1800, key=_hotel_search_key, cache_if=_has_live_data)
 def search_hotels(destination: str, checkin_date: str, checkout_date: str, 
                  budget_per_night: float, travelers: int = 1, accommodation_type: str = "hotel"):
     """Search for hotels using real hotel APIs (Amadeus + Booking.com)."""
@@ -664,246 +1309,282 @@ def search_hotels(destination: str, checkin_date: str, checkout_date: str,
     travelers = int(travelers) if travelers else 1
     accommodation_type = accommodation_type or "hotel"
     
-    print(f"Searching hotels in {destination} from {checkin_date} to {checkout_date}")
+    logger.info("Searching hotels in %s from %s to %s", destination, checkin_date, checkout_date)
     
-    checkin = datetime.strptime(checkin_date, "%Y-%m-%d")
-    checkout = datetime.strptime(checkout_date, "%Y-%m-%d")
-    nights = (checkout - checkin).days
+    nights = _nights_between(checkin_date, checkout_date)
+    search_params = {
+        "destination": destination,
+        "checkin_date": checkin_date,
+        "checkout_date": checkout_date,
+        "budget_per_night": budget_per_night
+    }
     
-    formatted_hotels = []
+    if _ALL_DUMMY_HOTELS:
+        return {
+            "hotels": _build_mock_hotels(budget_per_night, nights),
+            "nights": nights,
+            "search_params": search_params
+        }
     
-    # Try Booking.com API first
-    location_data = booking_api.search_locations(destination)
-    if location_data and len(location_data) > 0:
-        dest_id = location_data[0].get("dest_id")
-        if dest_id:
-            hotel_data = booking_api.search_hotels(
-                dest_id=str(dest_id),
-                checkin_date=checkin_date,
-                checkout_date=checkout_date,
-                adults=travelers
-            )
-            
-            if hotel_data and "result" in hotel_data:
-                for hotel in hotel_data["result"][:10]:  
-                    try:
-                        price_per_night = float(hotel.get("min_total_price", 0)) / nights
-                        
-                        if price_per_night <= budget_per_night:
-                            formatted_hotels.append({
-                                "name": hotel.get("hotel_name", "Unknown Hotel"),
-                                "rating": float(hotel.get("review_score", 3.0)),
-                                "price_per_night": price_per_night,
-                                "total_cost": price_per_night * nights,
-                                "location": hotel.get("district", "City Center"),
-                                "amenities": hotel.get("hotel_facilities", ["WiFi"]),
-                                "category": "luxury" if price_per_night > 200 else ("mid-range" if price_per_night > 100 else "budget"),
-                                "booking_url": hotel.get("url", ""),
-                                "hotel_id": hotel.get("hotel_id", "")
-                            })
-                    except (KeyError, ValueError, TypeError) as e:
-                        print(f"Error parsing hotel data: {e}")
-                        continue
+    # Only race providers that are live; a dummy Booking.com answers instantly and would always win
+    providers = [
+        provider for provider, api in ((_search_booking_hotels, booking_api), (_search_amadeus_hotels, amadeus_api))
+        if not api.use_dummy_data
+    ]
+    futures = [
+        _API_POOL.submit(provider, destination, checkin_date, checkout_date, travelers, nights, budget_per_night)
+        for provider in providers
+    ]
+    
+    # Keep whichever live provider returns usable results first
+    formatted_hotels, used_fallback = [], False
+    for future in as_completed(futures):
+        formatted_hotels, used_fallback = future.result()
+        if formatted_hotels:
+            break
+    
+    for future in futures:
+        future.cancel()
+    
+    hotels = [hotel._asdict() for hotel in formatted_hotels[:5]]
+    if not hotels and booking_api.use_dummy_data:
+        # Amadeus came back empty; stand in with the mock hotels, but don't let them be cached as live
+        hotels = _build_mock_hotels(budget_per_night, nights)[:5]
+        used_fallback = True
     
-    # Try Amadeus API as backup if Booking.com didn't work or returned no results
-    if not formatted_hotels:
-        city_codes = {"paris": "PAR", "london": "LON", "new york": "NYC", "tokyo": "TYO"}
-        city_code = city_codes.get(destination.lower(), "PAR")
-        
-        hotel_data = amadeus_api.search_hotels(
-            city_code=city_code,
-            checkin_date=checkin_date,
-            checkout_date=checkout_date,
-            adults=travelers
-        )
-        
-        if hotel_data and "data" in hotel_data:
-            for hotel_offer in hotel_data["data"][:5]:
-                try:
-                    hotel_info = hotel_offer.get("hotel", {})
-                    offers = hotel_offer.get("offers", [])
-                    
-                    if offers:
-                        price_info = offers[0].get("price", {})
-                        total_price = float(price_info.get("total", 0))
-                        price_per_night = total_price / nights
-                        
-                        if price_per_night <= budget_per_night:
-                            formatted_hotels.append({
-                                "name": hotel_info.get("name", "Unknown Hotel"),
-                                "rating": float(hotel_info.get("rating", 3.5)),
-                                "price_per_night": price_per_night,
-                                "total_cost": total_price,
-                                "location": hotel_info.get("address", {}).get("cityName", "City Center"),
-                                "amenities": hotel_info.get("amenities", ["WiFi"]),
-                                "category": "luxury" if price_per_night > 200 else ("mid-range" if price_per_night > 100 else "budget"),
-                                "booking_url": "",
-                                "hotel_id": hotel_info.get("hotelId", "")
-                            })
-                except (KeyError, ValueError, TypeError) as e:
-                    print(f"Error parsing Amadeus hotel data: {e}")
-                    continue
-    
-    if not formatted_hotels:
-        print("No hotels found within budget constraints")
+    if not hotels:
+        logger.warning("No hotels found within budget constraints")
     
     return {
-        "hotels": formatted_hotels[:5],
+        "hotels": hotels,
         "nights": nights,
-        "search_params": {
-            "destination": destination,
-            "checkin_date": checkin_date,
-            "checkout_date": checkout_date,
-            "budget_per_night": budget_per_night
-        }
+        "search_params": search_params,
+        "used_fallback": used_fallback
     }
 
-@tool
-def recommend_activities(destination: str, activity_preferences: List[str], 
-                        daily_activity_budget: float, trip_duration_days: int):
-    """Recommend activities using real activity APIs (TripAdvisor + GetYourGuide)."""
-    # Ensure all parameters are properly initialized and accessible
-    destination = destination or "Paris"
-    activity_preferences = activity_preferences if activity_preferences else ["culture", "food"]
-    daily_activity_budget = float(daily_activity_budget) if daily_activity_budget else 100.0
-    trip_duration_days = int(trip_duration_days) if trip_duration_days else 7
-    
-    print(f"Searching activities for {destination} with preferences: {activity_preferences}")
-    
+def _tripadvisor_activities(destination: str, preference_set: frozenset,
+                            daily_activity_budget: float) -> Tuple[List[ActivityRecord], bool]:
+    """Fetch TripAdvisor attractions matching the preferences and daily budget; also reports whether mock data filled in"""
     formatted_activities = []
     
-    # Try TripAdvisor API
-    location_data = tripadvisor_api.search_location(destination)
+    location_data, used_fallback = _unwrap_response(tripadvisor_api.search_location(destination))
     if location_data and "data" in location_data:
         location_id = location_data["data"][0].get("location_id")
         if location_id:
-            attractions_data = tripadvisor_api.get_attractions(location_id)
+            attractions_data, attractions_fallback = _unwrap_response(tripadvisor_api.get_attractions(location_id))
+            used_fallback = used_fallback or attractions_fallback
             
             if attractions_data and "data" in attractions_data:
                 for attraction in attractions_data["data"][:15]:
                     try:
-                        ta_category = attraction.get("category", {}).get("name", "").lower()
-                        our_category = "culture"  
+                        ta_category = (attraction.get("category") or _EMPTY).get("name", "").lower()
+                        our_category = next(
+                            (category for keyword, category in CATEGORY_KEYWORDS.items() if keyword in ta_category),
+                            "culture"
+                        )
                         
-                        if any(pref in ta_category for pref in ["museum", "historic", "cultural"]):
-                            our_category = "culture"
-                        elif any(pref in ta_category for pref in ["food", "restaurant", "culinary"]):
-                            our_category = "food"
-                        elif any(pref in ta_category for pref in ["adventure", "outdoor", "sports"]):
-                            our_category = "adventure"
-                        elif any(pref in ta_category for pref in ["spa", "beach", "relaxation"]):
-                            our_category = "relaxation"
-                        
-                        if our_category in activity_preferences:
-
-                            price_estimates = {
-                                "culture": 25.0,
-                                "food": 45.0, 
-                                "adventure": 65.0,
-                                "relaxation": 35.0
-                            }
-                            
-                            estimated_price = price_estimates.get(our_category, 30.0)
+                        if our_category in preference_set:
+                            estimated_price = ACTIVITY_PRICE_ESTIMATES.get(our_category, 30.0)
                             
                             if estimated_price <= daily_activity_budget:
-                                formatted_activities.append({
-                                    "name": attraction.get("name", "Unknown Activity"),
-                                    "description": attraction.get("description", "No description available")[:200],
-                                    "category": our_category,
-                                    "duration": "2-3 hours",
-                                    "price": estimated_price,
-                                    "rating": float(attraction.get("rating", 4.0)),
-                                    "location": attraction.get("address_obj", {}).get("address_string", "Unknown"),
-                                    "website": attraction.get("website", ""),
-                                    "activity_id": attraction.get("location_id", "")
-                                })
+                                formatted_activities.append(ActivityRecord(
+                                    name=attraction.get("name", "Unknown Activity"),
+                                    description=attraction.get("description", "No description available")[:200],
+                                    category=our_category,
+                                    duration="2-3 hours",
+                                    price=estimated_price,
+                                    rating=float(attraction.get("rating", 4.0)),
+                                    location=(attraction.get("address_obj") or _EMPTY).get("address_string", "Unknown"),
+                                    website=attraction.get("website", ""),
+                                    activity_id=attraction.get("location_id", "")
+                                ))
                     except (KeyError, ValueError, TypeError) as e:
-                        print(f"Error parsing TripAdvisor activity: {e}")
+                        logger.warning("Error parsing TripAdvisor activity: %s", e)
                         continue
     
-    # Try GetYourGuide API as backup
-    for preference in activity_preferences[:2]:  
-        activity_data = getyourguide_api.search_activities(destination, preference)
-        
-        if activity_data and "data" in activity_data:
-            for activity in activity_data["data"][:5]:
-                try:
-                    price = float(activity.get("price", {}).get("amount", 50.0))
-                    
-                    if price <= daily_activity_budget:
-                        formatted_activities.append({
-                            "name": activity.get("title", "Unknown Activity"),
-                            "description": activity.get("description", "No description available")[:200],
-                            "category": preference,
-                            "duration": activity.get("duration", "3 hours"),
-                            "price": price,
-                            "rating": float(activity.get("rating", 4.0)),
-                            "location": activity.get("location", "Unknown"),
-                            "website": activity.get("booking_url", ""),
-                            "activity_id": activity.get("id", "")
-                        })
-                except (KeyError, ValueError, TypeError) as e:
-                    print(f"Error parsing GetYourGuide activity: {e}")
-                    continue
-    
-    
-    unique_activities = []
-    seen_names = set()
-    
-    for activity in sorted(formatted_activities, key=lambda x: x["rating"], reverse=True):
-        if activity["name"] not in seen_names:
-            unique_activities.append(activity)
-            seen_names.add(activity["name"])
-    
-    return {"activities": unique_activities[:trip_duration_days]}
+    return formatted_activities, used_fallback
+
+def _getyourguide_activities(destination: str, preference: str,
+                             daily_activity_budget: float) -> Tuple[List[ActivityRecord], bool]:
+    """Fetch GetYourGuide activities for one preference within the daily budget; also reports whether mock data filled in"""
+    formatted_activities = []
+    
+    activity_data, used_fallback = _unwrap_response(getyourguide_api.search_activities(destination, preference))
+    
+    if activity_data and "data" in activity_data:
+        for activity in activity_data["data"][:5]:
+            try:
+                price = float((activity.get("price") or _EMPTY).get("amount", 50.0))
+                
+                if price <= daily_activity_budget:
+                    formatted_activities.append(ActivityRecord(
+                        name=activity.get("title", "Unknown Activity"),
+                        description=activity.get("description", "No description available")[:200],
+                        category=preference,
+                        duration=activity.get("duration", "3 hours"),
+                        price=price,
+                        rating=float(activity.get("rating", 4.0)),
+                        location=activity.get("location", "Unknown"),
+                        website=activity.get("booking_url", ""),
+                        activity_id=activity.get("id", "")
+                    ))
+            except (KeyError, ValueError, TypeError) as e:
+                logger.warning("Error parsing GetYourGuide activity: %s", e)
+                continue
+    
+    return formatted_activities, used_fallback
+
+@tool
+@tool_memoize(ttl=3600, key=_activity_search_key, cache_if=_has_live_data)
+def recommend_activities(destination: str, activity_preferences: List[str], 
+                        daily_activity_budget: float, trip_duration_days: int):
+    """Recommend activities using real activity APIs (TripAdvisor + GetYourGuide)."""
+    # Ensure all parameters are properly initialized and accessible
+    destination = destination or "Paris"
+    activity_preferences = activity_preferences if activity_preferences else ["culture", "food"]
+    daily_activity_budget = float(daily_activity_budget) if daily_activity_budget else 100.0
+    trip_duration_days = int(trip_duration_days) if trip_duration_days else 7
+    preference_set = frozenset(activity_preferences)
+    
+    logger.info("Searching activities for %s with preferences: %s", destination, activity_preferences)
+    
+    # TripAdvisor and the per-preference GetYourGuide searches are independent, so run them concurrently
+    futures = [_API_POOL.submit(_tripadvisor_activities, destination, preference_set, daily_activity_budget)]
+    futures.extend(
+        _API_POOL.submit(_getyourguide_activities, destination, preference, daily_activity_budget)
+        for preference in activity_preferences[:2]
+    )
+    
+    # Keep the best-rated entry per name as results are collected. Going in submission
+    # order means ties keep TripAdvisor results ahead of GetYourGuide ones.
+    best_by_name: Dict[str, ActivityRecord] = {}
+    used_fallback = False
+    for future in futures:
+        activities, source_fallback = future.result()
+        used_fallback = used_fallback or source_fallback
+        for activity in activities:
+            name = activity.name
+            previous = best_by_name.get(name)
+            if previous is None or activity.rating > previous.rating:
+                best_by_name[name] = activity
+    
+    # Take the top ones without sorting everything
+    unique_activities = heapq.nlargest(trip_duration_days, best_by_name.values(), key=_by_rating)
+    
+    return {"activities": [activity._asdict() for activity in unique_activities], "used_fallback": used_fallback}
+
+# Static destination facts, built once at import; lookups are keyed on lower-cased names
+_DESTINATION_TABLE: Dict[str, Dict] = {
+    "paris": {
+        "country": "France",
+        "currency": "EUR",
+        "language": "French",
+        "timezone": "CET",
+        "best_time_to_visit": "April-June, September-October",
+        "average_temperature": "15°C (59°F)",
+        "popular_districts": ["Marais", "Saint-Germain", "Montmartre", "Champs-Élysées"],
+        "transportation": ["Metro", "Bus", "Taxi", "Walking"],
+        "emergency_number": "112"
+    },
+    "london": {
+        "country": "United Kingdom",
+        "currency": "GBP",
+        "language": "English", 
+        "timezone": "GMT",
+        "best_time_to_visit": "May-September",
+        "average_temperature": "12°C (54°F)",
+        "popular_districts": ["Westminster", "Camden", "Shoreditch", "Covent Garden"],
+        "transportation": ["Underground", "Bus", "Taxi", "Walking"],
+        "emergency_number": "999"
+    }
+}
+
+_DEFAULT_DESTINATION_INFO = {
+    "country": "Unknown",
+    "currency": "USD",
+    "language": "Local Language",
+    "timezone": "Local Time",
+    "best_time_to_visit": "Year-round",
+    "average_temperature": "Variable",
+    "popular_districts": ["City Center"],
+    "transportation": ["Public Transport", "Taxi"],
+    "emergency_number": "Emergency Services"
+}
+
+@functools.lru_cache(maxsize=128)
+def _lookup_destination(destination_key: str) -> MappingProxyType:
+    """Read-only destination facts for a lower-cased destination name"""
+    return MappingProxyType(_DESTINATION_TABLE.get(destination_key, _DEFAULT_DESTINATION_INFO))
 
 @tool
 def get_destination_info(destination: str):
     """Get general information about a destination including weather, currency, etc."""
-    print(f"Getting destination info for {destination}")
-    
-    destination_data = {
-        "paris": {
-            "country": "France",
-            "currency": "EUR",
-            "language": "French",
-            "timezone": "CET",
-            "best_time_to_visit": "April-June, September-October",
-            "average_temperature": "15°C (59°F)",
-            "popular_districts": ["Marais", "Saint-Germain", "Montmartre", "Champs-Élysées"],
-            "transportation": ["Metro", "Bus", "Taxi", "Walking"],
-            "emergency_number": "112"
-        },
-        "london": {
-            "country": "United Kingdom",
-            "currency": "GBP",
-            "language": "English", 
-            "timezone": "GMT",
-            "best_time_to_visit": "May-September",
-            "average_temperature": "12°C (54°F)",
-            "popular_districts": ["Westminster", "Camden", "Shoreditch", "Covent Garden"],
-            "transportation": ["Underground", "Bus", "Taxi", "Walking"],
-            "emergency_number": "999"
-        }
-    }
+    logger.info("Getting destination info for %s", destination)
     
-    info = destination_data.get(destination.lower(), {
-        "country": "Unknown",
-        "currency": "USD",
-        "language": "Local Language",
-        "timezone": "Local Time",
-        "best_time_to_visit": "Year-round",
-        "average_temperature": "Variable",
-        "popular_districts": ["City Center"],
-        "transportation": ["Public Transport", "Taxi"],
-        "emergency_number": "Emergency Services"
-    })
+    # Hand out a plain dict copy so the response stays JSON-serializable and the cached view untouched
+    return {"destination_info": dict(_lookup_destination(destination.lower()))}
+
+# Dedicated threads for the blocking search tools when they're awaited. Kept separate from
+# _API_POOL because the tools themselves submit their API calls to that pool.
+_TOOL_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="travel_buddy_tool")
+
+def _offload_to_tool_pool(sync_tool):
+    """Give a sync tool an async entry point that runs its body on _TOOL_POOL.
     
-    return {"destination_info": info}
+    Results are also shared across worker processes through the Redis cache when one is
+    configured, using the tool's memo settings for the key, expiry and what gets stored.
+    """
+    func = sync_tool.func
+    ttl, key, cache_if = func.cache_settings
+    
+    async def run_on_tool_pool(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        
+        async def load():
+            return await loop.run_in_executor(_TOOL_POOL, functools.partial(func, *args, **kwargs))
+        
+        shared_key = ":".join(map(str, (sync_tool.name, *key(*args, **kwargs))))
+        return await cached_json(shared_key, int(ttl), load, cache_if)
+    
+    sync_tool.coroutine = run_on_tool_pool
+    return sync_tool
+
+for _search_tool in (search_flights, search_hotels, recommend_activities):
+    _offload_to_tool_pool(_search_tool)
 
 # ============ BUDGET OPTIMIZATION TOOLS ============
 
+_VALID_PRIORITIES = frozenset(("economy", "balanced", "luxury"))
+
+# Fallback candidates when the agent passes no search results; read-only, the optimizer never mutates them
+_DEFAULT_FLIGHTS = [
+    {"airline": "Delta Airlines", "price": 450.0, "duration": "PT8H30M", "stops": 1, "rating": 4.2, "booking_token": "mock_token_1"},
+    {"airline": "American Airlines", "price": 520.0, "duration": "PT7H45M", "stops": 0, "rating": 4.5, "booking_token": "mock_token_2"}
+]
+
+_DEFAULT_HOTELS = [
+    {"name": "Grand Central Hotel", "rating": 8.5, "price_per_night": 120.0, "total_cost": 840.0, "location": "City Center", "amenities": ["WiFi", "Restaurant", "Gym", "Pool"], "category": "mid-range", "booking_url": "", "hotel_id": "hotel_1"},
+    {"name": "Budget Comfort Inn", "rating": 7.8, "price_per_night": 65.0, "total_cost": 455.0, "location": "Suburb", "amenities": ["WiFi", "Parking"], "category": "budget", "booking_url": "", "hotel_id": "hotel_2"}
+]
+
+_DEFAULT_ACTIVITIES = [
+    {"name": "Local Food & Wine Tasting Tour", "price": 55.0, "category": "food", "duration": "3.5 hours", "rating": 4.8, "description": "Authentic local cuisine tasting"},
+    {"name": "Art Gallery & Museum Tour", "price": 35.0, "category": "culture", "duration": "3 hours", "rating": 4.6, "description": "Explore renowned art collections"},
+    {"name": "Adventure Park & Trails", "price": 65.0, "category": "adventure", "duration": "4 hours", "rating": 4.4, "description": "Outdoor adventure activities"}
+]
+
+def _best_value(candidates: List[Dict], price_key: str, budget: float) -> Dict:
+    """Pick the candidate with the best blend of rating and price, without annotating the inputs"""
+    def value_score(item: Dict) -> float:
+        price_score = (budget - item.get(price_key, 999999)) / budget if budget > 0 else 0
+        return (item.get("rating", 3.0) / 5.0) * 0.6 + price_score * 0.4
+    
+    best = max(candidates, key=value_score)
+    # Only the winner carries its score, on a copy
+    return {**best, "value_score": value_score(best)}
+
 @tool
+@tool_memoize(ttl=300)
 def optimize_travel_budget(total_budget: float, travelers: int, trip_duration_days: int, 
                           flights: List[Dict], hotels: List[Dict], activities: List[Dict],
                           budget_priority: Literal["economy", "balanced", "luxury"] = "balanced"):
@@ -914,28 +1595,13 @@ def optimize_travel_budget(total_budget: float, travelers: int, trip_duration_da
     flights = flights if flights and isinstance(flights, list) else []
     hotels = hotels if hotels and isinstance(hotels, list) else []
     activities = activities if activities and isinstance(activities, list) else []
-    budget_priority = budget_priority if budget_priority in ["economy", "balanced", "luxury"] else "balanced"
-    
-    print(f"Optimizing budget of ${total_budget} for {travelers} travelers, {trip_duration_days} days")
-    
-    if not flights:
-        flights = [
-            {"airline": "Delta Airlines", "price": 450.0, "duration": "PT8H30M", "stops": 1, "rating": 4.2, "booking_token": "mock_token_1"},
-            {"airline": "American Airlines", "price": 520.0, "duration": "PT7H45M", "stops": 0, "rating": 4.5, "booking_token": "mock_token_2"}
-        ]
+    budget_priority = budget_priority if budget_priority in _VALID_PRIORITIES else "balanced"
     
-    if not hotels:
-        hotels = [
-            {"name": "Grand Central Hotel", "rating": 8.5, "price_per_night": 120.0, "total_cost": 840.0, "location": "City Center", "amenities": ["WiFi", "Restaurant", "Gym", "Pool"], "category": "mid-range", "booking_url": "", "hotel_id": "hotel_1"},
-            {"name": "Budget Comfort Inn", "rating": 7.8, "price_per_night": 65.0, "total_cost": 455.0, "location": "Suburb", "amenities": ["WiFi", "Parking"], "category": "budget", "booking_url": "", "hotel_id": "hotel_2"}
-        ]
+    logger.info("Optimizing budget of $%s for %s travelers, %s days", total_budget, travelers, trip_duration_days)
     
-    if not activities:
-        activities = [
-            {"name": "Local Food & Wine Tasting Tour", "price": 55.0, "category": "food", "duration": "3.5 hours", "rating": 4.8, "description": "Authentic local cuisine tasting"},
-            {"name": "Art Gallery & Museum Tour", "price": 35.0, "category": "culture", "duration": "3 hours", "rating": 4.6, "description": "Explore renowned art collections"},
-            {"name": "Adventure Park & Trails", "price": 65.0, "category": "adventure", "duration": "4 hours", "rating": 4.4, "description": "Outdoor adventure activities"}
-        ]
+    flights = flights or _DEFAULT_FLIGHTS
+    hotels = hotels or _DEFAULT_HOTELS
+    activities = activities or _DEFAULT_ACTIVITIES
     
     flight_budget_ratio = 0.35
     hotel_budget_ratio = 0.45  
@@ -955,12 +1621,7 @@ def optimize_travel_budget(total_budget: float, travelers: int, trip_duration_da
     elif budget_priority == "luxury":
         selected_flight = max(affordable_flights, key=lambda f: f.get("rating", 0))
     else:  
-        for flight in affordable_flights:
-            rating = flight.get("rating", 3.0)
-            price = flight.get("price", 999999)
-            price_score = (flight_budget - price) / flight_budget if flight_budget > 0 else 0
-            flight["value_score"] = (rating / 5.0) * 0.6 + price_score * 0.4
-        selected_flight = max(affordable_flights, key=lambda f: f.get("value_score", 0))
+        selected_flight = _best_value(affordable_flights, "price", flight_budget)
     
 
     remaining_budget = per_person_budget - selected_flight.get("price", 0)
@@ -975,22 +1636,24 @@ def optimize_travel_budget(total_budget: float, travelers: int, trip_duration_da
     elif budget_priority == "luxury":
         selected_hotel = max(affordable_hotels, key=lambda h: h.get("rating", 0))
     else:  
-        for hotel in affordable_hotels:
-            rating = hotel.get("rating", 3.0)
-            price_per_night = hotel.get("price_per_night", 999999)
-            price_score = (hotel_budget_adjusted - price_per_night) / hotel_budget_adjusted if hotel_budget_adjusted > 0 else 0
-            hotel["value_score"] = (rating / 5.0) * 0.6 + price_score * 0.4
-        selected_hotel = max(affordable_hotels, key=lambda h: h.get("value_score", 0))
+        selected_hotel = _best_value(affordable_hotels, "price_per_night", hotel_budget_adjusted)
     
 
     total_cost = selected_flight.get("price", 0) + selected_hotel.get("total_cost", 0)
     remaining_for_activities = per_person_budget - total_cost
     daily_activity_budget = remaining_for_activities / trip_duration_days if trip_duration_days > 0 else 0
     
-    selected_activities = []
-    current_activity_cost = 0
-    for activity in sorted(activities, key=lambda a: a.get("rating", 0), reverse=True):
-        activity_price = activity.get("price", 0)
+    ranked_activities = sorted(activities, key=lambda a: a.get("rating", 0), reverse=True)
+    activity_prices = [a.get("price", 0) for a in ranked_activities]
+    
+    # The leading run of activities that all fit is found by bisecting the running totals
+    running_totals = list(itertools.accumulate(activity_prices))
+    cutoff = bisect.bisect_right(running_totals, remaining_for_activities)
+    selected_activities = ranked_activities[:cutoff]
+    current_activity_cost = running_totals[cutoff - 1] if cutoff else 0
+    
+    # Cheaper activities further down the ranking may still fit in what's left
+    for activity, activity_price in zip(ranked_activities[cutoff:], activity_prices[cutoff:]):
         if current_activity_cost + activity_price <= remaining_for_activities:
             selected_activities.append(activity)
             current_activity_cost += activity_price
@@ -998,11 +1661,13 @@ def optimize_travel_budget(total_budget: float, travelers: int, trip_duration_da
     total_trip_cost = total_cost + current_activity_cost
     budget_remaining = per_person_budget - total_trip_cost
     
+    # Cheapest options feed both the recommendations and the savings summary
+    min_flight_price = min(f.get("price", 0) for f in flights)
+    min_hotel_price = min(h.get("price_per_night", 0) for h in hotels)
+    
     recommendations = []
     if budget_remaining < 0:
         recommendations.append("Budget exceeded - consider these options:")
-        min_flight_price = min(flights, key=lambda f: f.get("price", 0)).get("price", 0)
-        min_hotel_price = min(hotels, key=lambda h: h.get("price_per_night", 0)).get("price_per_night", 0)
         recommendations.append(f"• Switch to economy flight (save ${selected_flight.get('price', 0) - min_flight_price:.2f})")
         recommendations.append(f"• Choose budget hotel (save ${selected_hotel.get('price_per_night', 0) - min_hotel_price:.2f}/night)")
         recommendations.append("• Reduce number of paid activities")
@@ -1027,8 +1692,8 @@ def optimize_travel_budget(total_budget: float, travelers: int, trip_duration_da
         "budget_status": "within_budget" if budget_remaining >= 0 else "over_budget",
         "recommendations": recommendations,
         "savings_opportunities": {
-            "flight_savings": selected_flight.get("price", 0) - min(flights, key=lambda f: f.get("price", 0)).get("price", 0),
-            "hotel_savings": selected_hotel.get("price_per_night", 0) - min(hotels, key=lambda h: h.get("price_per_night", 0)).get("price_per_night", 0)
+            "flight_savings": selected_flight.get("price", 0) - min_flight_price,
+            "hotel_savings": selected_hotel.get("price_per_night", 0) - min_hotel_price
         }
     }
     
@@ -1036,6 +1701,47 @@ def optimize_travel_budget(total_budget: float, travelers: int, trip_duration_da
 
 # ============ ITINERARY GENERATION TOOLS ============
 
+# Fallback selections when the agent passes none; read-only, the itinerary only reads from them.
+# The flight's departure/arrival times depend on the check-in date and are filled in per call.
+_DEFAULT_SELECTED_FLIGHT = {
+    "airline": "Delta Airlines",
+    "price": 450.0,
+    "duration": "PT8H30M",
+    "stops": 1,
+    "rating": 4.2,
+    "booking_token": "mock_token_1"
+}
+
+_DEFAULT_SELECTED_HOTEL = {
+    "name": "Grand Central Hotel",
+    "rating": 8.5,
+    "price_per_night": 120.0,
+    "total_cost": 840.0,
+    "location": "City Center",
+    "amenities": ["WiFi", "Restaurant", "Gym", "Pool"],
+    "category": "mid-range",
+    "booking_url": "",
+    "hotel_id": "hotel_1"
+}
+
+_DEFAULT_SELECTED_ACTIVITIES = [
+    {"name": "Local Food & Wine Tasting Tour", "price": 55.0, "category": "food", "duration": "3.5 hours", "rating": 4.8, "description": "Authentic local cuisine tasting", "location": "Food District", "website": ""},
+    {"name": "Art Gallery & Museum Tour", "price": 35.0, "category": "culture", "duration": "3 hours", "rating": 4.6, "description": "Explore renowned art collections", "location": "Arts Quarter", "website": ""},
+    {"name": "Adventure Park & Trails", "price": 65.0, "category": "adventure", "duration": "4 hours", "rating": 4.4, "description": "Outdoor adventure activities", "location": "Nature Valley", "website": ""}
+]
+
+_DEFAULT_ITINERARY_DESTINATION_INFO = {
+    "country": "France",
+    "currency": "EUR",
+    "language": "French",
+    "timezone": "CET",
+    "best_time_to_visit": "April-June, September-October",
+    "average_temperature": "15°C (59°F)",
+    "popular_districts": ["Marais", "Saint-Germain", "Montmartre"],
+    "transportation": ["Metro", "Bus", "Taxi", "Walking"],
+    "emergency_number": "112"
+}
+
 @tool
 def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_date: str,
                                selected_flight: Dict, selected_hotel: Dict, selected_activities: List[Dict],
@@ -1048,55 +1754,30 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
     
     if not selected_flight or not isinstance(selected_flight, dict):
         selected_flight = {
-            "airline": "Delta Airlines",
-            "price": 450.0,
-            "duration": "PT8H30M",
+            **_DEFAULT_SELECTED_FLIGHT,
             "departure_time": f"{checkin_date}T08:00:00",
-            "arrival_time": f"{checkin_date}T16:30:00",
-            "stops": 1,
-            "rating": 4.2,
-            "booking_token": "mock_token_1"
+            "arrival_time": f"{checkin_date}T16:30:00"
         }
     
     if not selected_hotel or not isinstance(selected_hotel, dict):
-        selected_hotel = {
-            "name": "Grand Central Hotel",
-            "rating": 8.5,
-            "price_per_night": 120.0,
-            "total_cost": 840.0,
-            "location": "City Center",
-            "amenities": ["WiFi", "Restaurant", "Gym", "Pool"],
-            "category": "mid-range",
-            "booking_url": "",
-            "hotel_id": "hotel_1"
-        }
+        selected_hotel = _DEFAULT_SELECTED_HOTEL
     
     if not selected_activities or not isinstance(selected_activities, list):
-        selected_activities = [
-            {"name": "Local Food & Wine Tasting Tour", "price": 55.0, "category": "food", "duration": "3.5 hours", "rating": 4.8, "description": "Authentic local cuisine tasting", "location": "Food District", "website": ""},
-            {"name": "Art Gallery & Museum Tour", "price": 35.0, "category": "culture", "duration": "3 hours", "rating": 4.6, "description": "Explore renowned art collections", "location": "Arts Quarter", "website": ""},
-            {"name": "Adventure Park & Trails", "price": 65.0, "category": "adventure", "duration": "4 hours", "rating": 4.4, "description": "Outdoor adventure activities", "location": "Nature Valley", "website": ""}
-        ]
+        selected_activities = _DEFAULT_SELECTED_ACTIVITIES
     
     if not destination_info or not isinstance(destination_info, dict):
-        destination_info = {
-            "country": "France",
-            "currency": "EUR",
-            "language": "French",
-            "timezone": "CET",
-            "best_time_to_visit": "April-June, September-October",
-            "average_temperature": "15°C (59°F)",
-            "popular_districts": ["Marais", "Saint-Germain", "Montmartre"],
-            "transportation": ["Metro", "Bus", "Taxi", "Walking"],
-            "emergency_number": "112"
-        }
+        destination_info = _DEFAULT_ITINERARY_DESTINATION_INFO
     
-    print(f"Generating detailed itinerary for {destination}")
+    logger.info("Generating detailed itinerary for %s", destination)
     
-    start_date = datetime.strptime(checkin_date, "%Y-%m-%d")
-    end_date = datetime.strptime(checkout_date, "%Y-%m-%d")
+    start_date = _parse_date(checkin_date)
+    end_date = _parse_date(checkout_date)
     trip_duration = (end_date - start_date).days
     
+    # Every date string the itinerary needs, built once; date.isoformat is much cheaper than strftime
+    one_day = timedelta(days=1)
+    date_strs = [(start_date + one_day * i).isoformat() for i in range(trip_duration + 1)]
+    
     itinerary = []
     
     # Add destination info to itinerary header
@@ -1109,7 +1790,7 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
     
     # Day 1: Arrival
     day_1 = {
-        "date": start_date.strftime("%Y-%m-%d"),
+        "date": start_date.isoformat(),
         "day_number": 1,
         "title": "Arrival Day",
         "activities": [
@@ -1154,31 +1835,17 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
     }
     itinerary.append(day_1)
     
+    # Day count and cost are tallied as days are added, so the list is never re-scanned
+    total_days = 1
+    total_itinerary_cost = day_1["daily_total"]
+    
     # Middle days: Activities
     activity_index = 0
     for day_num in range(2, trip_duration + 1):
-        current_date = start_date + timedelta(days=day_num - 1)
-        
-        day_activities = [
-            {
-                "time": "Morning",
-                "activity": "Breakfast",
-                "description": "Breakfast at hotel or local cafe",
-                "cost": 15,
-                "duration": "1 hour",
-                "booking_info": {
-                    "type": "meal",
-                    "suggestion": "Hotel breakfast or nearby cafe"
-                }
-            }
-        ]
-        
-        daily_total = 15
-        
         # Add main activity if available
         if activity_index < len(selected_activities):
             activity = selected_activities[activity_index]
-            day_activities.append({
+            main_activity = {
                 "time": "Mid-Morning to Afternoon",
                 "activity": activity.get("name", "Activity"),
                 "description": activity.get("description", "Enjoy local activities"),
@@ -1191,11 +1858,10 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
                     "location": activity.get("location", ""),
                     "rating": activity.get("rating", 4.0)
                 }
-            })
-            daily_total += activity.get("price", 0)
+            }
             activity_index += 1
         else:
-            day_activities.append({
+            main_activity = {
                 "time": "Morning to Afternoon", 
                 "activity": "Free Exploration",
                 "description": f"Explore {destination} at your own pace",
@@ -1205,34 +1871,50 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
                     "type": "free_time",
                     "suggestion": "Visit local markets, parks, or neighborhoods"
                 }
-            })
-            daily_total += 30
+            }
         
-        day_activities.append({
-            "time": "Evening",
-            "activity": "Dinner & Leisure",
-            "description": "Local dining and evening activities",
-            "cost": 60,
-            "duration": "2-3 hours",
-            "booking_info": {
-                "type": "meal",
-                "suggestion": "Try local specialties and nightlife"
+        # Every middle day has exactly breakfast, a main activity and dinner, so build the list in one go
+        day_activities = [
+            {
+                "time": "Morning",
+                "activity": "Breakfast",
+                "description": "Breakfast at hotel or local cafe",
+                "cost": 15,
+                "duration": "1 hour",
+                "booking_info": {
+                    "type": "meal",
+                    "suggestion": "Hotel breakfast or nearby cafe"
+                }
+            },
+            main_activity,
+            {
+                "time": "Evening",
+                "activity": "Dinner & Leisure",
+                "description": "Local dining and evening activities",
+                "cost": 60,
+                "duration": "2-3 hours",
+                "booking_info": {
+                    "type": "meal",
+                    "suggestion": "Try local specialties and nightlife"
+                }
             }
-        })
-        daily_total += 60
+        ]
+        daily_total = 15 + main_activity["cost"] + 60
         
         day_plan = {
-            "date": current_date.strftime("%Y-%m-%d"),
+            "date": date_strs[day_num - 1],
             "day_number": day_num,
             "title": f"Day {day_num} - Exploration",
             "activities": day_activities,
             "daily_total": daily_total
         }
         itinerary.append(day_plan)
+        total_days += 1
+        total_itinerary_cost += daily_total
     
     # Last day: Departure
     departure_day = {
-        "date": end_date.strftime("%Y-%m-%d"),
+        "date": end_date.isoformat(),
         "day_number": trip_duration + 1,
         "title": "Departure Day",
         "activities": [
@@ -1262,13 +1944,12 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
         "daily_total": 0
     }
     itinerary.append(departure_day)
-    
-    # Calculate total itinerary cost
-    total_itinerary_cost = sum(day.get("daily_total", 0) for day in itinerary if day.get("type") != "destination_info")
+    total_days += 1
+    total_itinerary_cost += departure_day["daily_total"]
     
     return {
         "itinerary": itinerary, 
-        "total_days": len([d for d in itinerary if d.get("type") != "destination_info"]),
+        "total_days": total_days,
         "total_cost": total_itinerary_cost,
         "booking_summary": {
             "flight": {
@@ -1286,244 +1967,593 @@ def generate_detailed_itinerary(destination: str, checkin_date: str, checkout_da
         }
     }
 
-# ============ AGENT TRANSFER TOOLS ============
+# ============ AGENT DEFINITIONS ============
 
-@tool(return_direct=True)
-def transfer_to_hotel_search():
-    """Transfer to hotel search agent for accommodation recommendations."""
-    return "Transferring to Hotel Search Agent for accommodation options..."
+# System prompts are module constants so each agent is built from a single shared string
+_SEARCH_PROMPT = (
+    "You are a travel search specialist with access to real flight (Amadeus), hotel (Booking.com, Amadeus) "
+    "and activity (TripAdvisor, GetYourGuide) APIs. "
+    "On your first turn, call search_flights, search_hotels, recommend_activities and get_destination_info together "
+    "in a single response using the user's destination, dates, travelers and budget; they are independent and run in parallel. "
+    "After getting the data, provide a well-formatted summary of the flight options, hotel options, recommended activities "
+    "and destination details. Format the information clearly without emojis, using headers and bullet points. "
+    "IMPORTANT: Include all the technical details so the itinerary generator can access this data later: "
+    "flights (airline, price, duration, stops, rating), hotels (name, price_per_night, total_cost, rating, location, amenities) "
+    "and activities (name, price, category, duration, rating, description)."
+)
 
-@tool(return_direct=True) 
-def transfer_to_activity_recommender():
-    """Transfer to activity recommender agent for activity suggestions."""
-    return "Transferring to Activity Recommender Agent for activity suggestions..."
+_TRIP_SELECTION_PROMPT = (
+    "Read the user's trip request below and fill in the trip details: "
+    "destination city, arrival and departure dates as YYYY-MM-DD, the budget per person in USD "
+    "(divide a stated group total by the number of travelers), the number of travelers, and the budget priority (economy, balanced or luxury; balanced if unstated)."
+)
 
-@tool(return_direct=True)
-def transfer_to_budget_optimizer():
-    """Transfer to budget optimizer agent for budget optimization."""
-    return "Transferring to Budget Optimizer Agent for budget analysis..."
+_ITINERARY_WRITER_PROMPT = (
+    "You are an itinerary planning specialist. The optimized budget and the day-by-day itinerary for the user's trip "
+    "are given below as JSON. Present the complete travel plan in a beautiful, day-by-day format that's easy to read "
+    "and follow, without emojis, covering the selected flight, hotel, activities, budget breakdown, booking information "
+    "and practical advice. Do NOT ask for confirmation."
+)
 
-@tool(return_direct=True)
-def transfer_to_itinerary_generator():
-    """Transfer to itinerary generator agent for detailed itinerary creation."""
-    return "Transferring to Itinerary Generator Agent for detailed planning..."
+def _to_json_text(result: Any) -> Any:
+    """Encode a tool result for the LLM with orjson; strings pass through untouched"""
+    if isinstance(result, str):
+        return result
+    return orjson.dumps(result, default=str).decode()
 
-@tool(return_direct=True)
-def transfer_to_flight_search():
-    """Transfer to flight search agent for flight options."""
-    return "Transferring to Flight Search Agent for flight options..."
+def _agent_tool(base_tool):
+    """Agent-facing copy of a tool that returns orjson-encoded text.
+    
+    ToolNode would otherwise serialize dict results with the stdlib json module on every call.
+    The original tool keeps returning dicts for the plan executor, which reads fields out of them.
+    """
+    def func(*args, **kwargs):
+        return _to_json_text(base_tool.func(*args, **kwargs))
+    
+    async def coroutine(*args, **kwargs):
+        return _to_json_text(await base_tool.coroutine(*args, **kwargs))
+    
+    return base_tool.model_copy(update={"func": func, "coroutine": coroutine if base_tool.coroutine else None})
 
-# ============ AGENT DEFINITIONS ============
+# Agents are built on first use, so importing this module doesn't construct the model client or agent graphs
 
-# Flight Search Agent
-flight_search_tools = [search_flights, get_destination_info, transfer_to_hotel_search]
-flight_search_agent = create_react_agent(
-    model,
-    flight_search_tools,
-    prompt=(
-        "You are a flight search specialist with access to real flight APIs (Amadeus). "
-        "You help find the best flight options within budget constraints. "
-        "Always search for flights first, then get destination information. "
-        "After getting the data, provide a well-formatted summary with flight options, prices, and destination details. "
-        "Format the information clearly without emojis, using headers and bullet points. "
-        "IMPORTANT: When you present flight options, include all the technical details (airline, price, duration, stops, rating) "
-        "so the budget optimizer can access this data later. "
-        "Then transfer to hotel search."
-    ),
-)
+# Search Agent: flights, hotels, activities and destination info requested as one parallel tool-call batch
+search_tools = [_agent_tool(t) for t in (search_flights, search_hotels, recommend_activities, get_destination_info)]
 
-# Hotel Search Agent  
-hotel_search_tools = [search_hotels, transfer_to_activity_recommender]
-hotel_search_agent = create_react_agent(
-    model,
-    hotel_search_tools,
-    prompt=(
-        "You are a hotel search specialist with access to real hotel APIs (Booking.com, Amadeus). "
-        "You find the best accommodation options within budget and preference constraints. "
-        "After searching, provide a clear summary of the top hotel options with names, prices, ratings, and amenities. "
-        "Format the information in a readable way without emojis, using clear headers and organization. "
-        "IMPORTANT: Include all hotel details (name, price_per_night, total_cost, rating, location, amenities) "
-        "so the budget optimizer can access this data later. "
-        "Then transfer to activity recommender."
-    ),
-)
+@_build_once
+def get_search_agent():
+    """Return the search agent, building it on first use"""
+    return create_react_agent(
+        get_model().bind_tools(search_tools, parallel_tool_calls=True),
+        search_tools,
+        prompt=_SEARCH_PROMPT,
+    )
 
-# Activity Recommender Agent
-activity_recommender_tools = [recommend_activities, transfer_to_budget_optimizer]
-activity_recommender_agent = create_react_agent(
-    model,
-    activity_recommender_tools,
-    prompt=(
-        "You are an activity recommendation specialist with access to real activity APIs (TripAdvisor, GetYourGuide). "
-        "You suggest activities based on user preferences using real data from attraction databases. "
-        "After finding activities, provide a nicely formatted list of recommended activities with descriptions, prices, and ratings. "
-        "Present the information in a user-friendly format without emojis, using clear organization. "
-        "IMPORTANT: Include all activity details (name, price, category, duration, rating, description) "
-        "so the budget optimizer can access this data later. "
-        "Then transfer to budget optimizer."
-    ),
-)
+# Tag on the LLM calls that write the user-facing answer; their tokens are streamed straight to the console
+FINAL_RESPONSE_TAG = "final"
 
-# Budget Optimizer Agent
-budget_optimizer_tools = [optimize_travel_budget, transfer_to_itinerary_generator]
-budget_optimizer_agent = create_react_agent(
-    model,
-    budget_optimizer_tools,
-    prompt=(
-        "You are a budget optimization specialist that analyzes real pricing data to create optimal travel combinations. "
-        "You consider flight prices, hotel costs, and activity fees to maximize value within budget constraints. "
-        
-        "IMPORTANT: Before calling optimize_travel_budget, you must extract the flight, hotel, and activity data from previous agent messages. "
-        "Look through the conversation history to find:"
-        "1. Flight search results (containing airline, price, duration, etc.)"
-        "2. Hotel search results (containing name, price_per_night, rating, etc.)"  
-        "3. Activity recommendations (containing name, price, category, etc.)"
-        
-        "Parse this data from the previous messages and pass it as the flights, hotels, and activities parameters. "
-        "The user provided: total_budget per person, travelers count, and trip duration."
-        
-        "After optimizing, provide a clear budget breakdown with selected options, total costs, and recommendations. "
-        "Format as a readable budget summary without emojis, using clear headings and organization. "
-        "Then transfer to itinerary generator."
-    ),
-)
+# Itinerary Generator: no ReAct loop. One structured-output call reads the trip details, the budget
+# optimizer and itinerary builder run directly on the search results, and one final call writes it up.
+class TripSelection(BaseModel):
+    """Trip details the itinerary stage needs from the conversation"""
+    destination: str = Field(description="Destination city")
+    checkin_date: str = Field(description="Arrival date, YYYY-MM-DD")
+    checkout_date: str = Field(description="Departure date from the destination, YYYY-MM-DD")
+    budget_per_person: float = Field(description="Budget per traveler, in USD")
+    travelers: int = Field(description="Number of travelers")
+    budget_priority: Literal["economy", "balanced", "luxury"] = "balanced"
 
-# Itinerary Generator Agent
-itinerary_generator_tools = [generate_detailed_itinerary]
-itinerary_generator_agent = create_react_agent(
-    model,
-    itinerary_generator_tools,
-    prompt=(
-        "You are an itinerary planning specialist that creates detailed day-by-day travel plans with real booking information. "
-        "You generate comprehensive itineraries with timing, costs, booking details, and practical travel tips. "
-        
-        "IMPORTANT: You MUST create a complete detailed day-by-day itinerary automatically. Do NOT ask for confirmation. "
-        "Use the information from previous agents to extract:"
-        "1. selected_flight: Extract the chosen flight details (airline, price, departure time, etc.)"
-        "2. selected_hotel: Extract the chosen hotel details (name, price, location, amenities, etc.)"  
-        "3. selected_activities: Extract the list of chosen activities with details"
-        "4. Extract destination, checkin_date, checkout_date from the conversation"
-        
-        "If the budget optimizer didn't work properly, manually select the best options from the previous agents:"
-        "- Choose the best value flight (balance of price and rating)"
-        "- Choose a mid-range hotel that fits the budget"
-        "- Select 3-5 activities that match the user's preferences"
-        
-        "Then call generate_detailed_itinerary with the proper parameters to create a complete day-by-day plan. "
-        "Present the final itinerary in a beautiful, day-by-day format that's easy to read and follow, without emojis. "
-        "Include booking information and practical advice. Provide the complete travel plan automatically."
-    ),
-)
+@_build_once
+def get_trip_selector():
+    """Return the structured-output model that extracts TripSelection, building it on first use"""
+    return get_deterministic_model().with_structured_output(TripSelection)
+
+@_build_once
+def get_itinerary_writer():
+    """Return the model that writes the final itinerary; tagged so its tokens stream to the console"""
+    return get_model().with_config(tags=[FINAL_RESPONSE_TAG])
+
+def warm_up_agents():
+    """Build every agent ahead of the first request, e.g. from a server's startup hook"""
+    get_search_agent()
+    get_trip_selector()
+    get_itinerary_writer()
 
 # ============ TASK DEFINITIONS ============
 
-@task
-def call_flight_search_agent(messages):
-   if not isinstance(messages, list):
-       messages = [messages]
-   
-   response = flight_search_agent.invoke({"messages": messages})
-   return response["messages"]
+# Cap on agent runs talking to the LLM provider at once, so concurrent agents don't trip rate limits
+MAX_CONCURRENT_LLM = int(os.getenv("TRAVEL_BUDDY_MAX_CONCURRENCY", "5"))
+LLM_MAX_ATTEMPTS = 4
+
+# Concurrent copies of the read-only search stage; the first to finish wins. Each replica pays for
+# its own LLM and API calls, so this stays at 1 unless tail latency matters more than cost.
+RACE_REPLICAS = max(1, int(os.getenv("TRAVEL_BUDDY_RACE_REPLICAS", "1")))
 
-@task  
-def call_hotel_search_agent(messages):
-   if not isinstance(messages, list):
-       messages = [messages]
+# asyncio primitives bind to the loop they're first used on (Python < 3.10), so keep one per loop
+_LLM_SEMAPHORES: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def _llm_semaphore() -> asyncio.Semaphore:
+   loop = asyncio.get_running_loop()
+   semaphore = _LLM_SEMAPHORES.get(loop)
+   if semaphore is None:
+       semaphore = _LLM_SEMAPHORES[loop] = asyncio.Semaphore(MAX_CONCURRENT_LLM)
+   return semaphore
+
+async def _invoke_llm(runnable, llm_input):
+   """Run a model or agent under the LLM concurrency cap, backing off and retrying on rate limits and transient errors"""
+   from openai import APIConnectionError, InternalServerError, RateLimitError
    
-   response = hotel_search_agent.invoke({"messages": messages})
-   return response["messages"]
+   for attempt in range(LLM_MAX_ATTEMPTS):
+       try:
+           async with _llm_semaphore():
+               return await runnable.ainvoke(llm_input)
+       except (RateLimitError, APIConnectionError, InternalServerError) as e:
+           if attempt == LLM_MAX_ATTEMPTS - 1:
+               raise
+           # Exponential backoff with jitter, capped at 30s; sleep without holding a slot
+           delay = min(30.0, 2.0 ** attempt) + random.uniform(0, 1)
+           logger.warning("LLM provider error (%s), retrying in %.1fs", type(e).__name__, delay)
+           await asyncio.sleep(delay)
 
-@task
-def call_activity_recommender_agent(messages):
-   if not isinstance(messages, list):
-       messages = [messages]
+async def _invoke_agent(agent, messages):
+   return await _invoke_llm(agent, {"messages": messages})
+
+async def _race_agent(agent, messages, replicas):
+   """Run several copies of an agent and return the first successful result, cancelling the rest"""
+   if replicas <= 1:
+       return await _invoke_agent(agent, messages)
    
-   response = activity_recommender_agent.invoke({"messages": messages})
-   return response["messages"]
+   pending = {asyncio.ensure_future(_invoke_agent(agent, messages)) for _ in range(replicas)}
+   try:
+       while pending:
+           done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+           failed = [t for t in done if t.exception() is not None]
+           if len(failed) < len(done):
+               return next(t for t in done if t.exception() is None).result()
+           if not pending:
+               # Every replica failed; surface the last error
+               raise failed[-1].exception()
+   finally:
+       for t in pending:
+           t.cancel()
+
+# Agent tasks take the workflow's message list as-is and return only the messages the agent added,
+# so the workflow can append them without re-copying the history it already holds
 
 @task
-def call_budget_optimizer_agent(messages):
-   if not isinstance(messages, list):
-       messages = [messages]
-   
-   response = budget_optimizer_agent.invoke({"messages": messages})
-   return response["messages"]
+async def call_search_agent(messages):
+   # Search tools are read-only, so duplicate replicas are safe to race
+   response = await _race_agent(get_search_agent(), messages, RACE_REPLICAS)
+   return response["messages"][len(messages):]
+
+def _search_results(messages) -> Dict[str, Any]:
+   """Decode the search tools' JSON results from the conversation, keyed by tool name"""
+   results = {}
+   for m in messages:
+       if getattr(m, "type", None) == "tool" and m.name in _ITINERARY_CONTEXT_TOOLS:
+           try:
+               results[m.name] = orjson.loads(m.content)
+           except (orjson.JSONDecodeError, TypeError):
+               continue
+   return results
 
 @task
-def call_itinerary_generator_agent(messages):
-   if not isinstance(messages, list):
-       messages = [messages]
+async def call_itinerary_generator(messages):
+   from langchain_core.messages import SystemMessage
+   
+   # The selector and writer see the user's request and any workflow notes, not the raw search payloads
+   conversation = [m for m in messages if getattr(m, "type", None) in ("human", "system")]
+   
+   trip = await _invoke_llm(get_trip_selector(), [SystemMessage(content=_TRIP_SELECTION_PROMPT), *conversation])
+   results = _search_results(messages)
+   
+   # Normalize the dates once; the optimizer and itinerary builder both get the same valid pair.
+   # One-way trips or unreadable dates fall back to a week-long stay.
+   try:
+       checkin = _parse_date(trip.checkin_date)
+   except ValueError:
+       checkin = date.today()
+   try:
+       checkout = _parse_date(trip.checkout_date)
+   except ValueError:
+       checkout = None
+   if checkout is None or checkout <= checkin:
+       checkout = checkin + timedelta(days=7)
+   checkin_date, checkout_date = checkin.isoformat(), checkout.isoformat()
+   trip_duration_days = (checkout - checkin).days
+   # Requests quote the budget per person; the optimizer works from the group total
+   travelers = max(1, trip.travelers)
    
-   response = itinerary_generator_agent.invoke({"messages": messages})
-   return response["messages"]
+   # The optimizer falls back to typical prices for any search that returned nothing
+   budget = await optimize_travel_budget.ainvoke({
+       "total_budget": trip.budget_per_person * travelers,
+       "travelers": travelers,
+       "trip_duration_days": trip_duration_days,
+       "flights": results.get("search_flights", {}).get("flights", []),
+       "hotels": results.get("search_hotels", {}).get("hotels", []),
+       "activities": results.get("recommend_activities", {}).get("activities", []),
+       "budget_priority": trip.budget_priority
+   })
+   itinerary = await generate_detailed_itinerary.ainvoke({
+       "destination": trip.destination,
+       "checkin_date": checkin_date,
+       "checkout_date": checkout_date,
+       "selected_flight": budget["selected_flight"],
+       "selected_hotel": budget["selected_hotel"],
+       "selected_activities": budget["selected_activities"],
+       "destination_info": results.get("get_destination_info", {}).get("destination_info")
+   })
+   
+   final_reply = await _invoke_llm(get_itinerary_writer(), [
+       SystemMessage(content=_ITINERARY_WRITER_PROMPT),
+       *conversation,
+       SystemMessage(content=orjson.dumps({"budget": budget, "itinerary": itinerary}, default=str).decode())
+   ])
+   return [final_reply]
 
 # ============ MAIN WORKFLOW ============
 
+class PipelineResult(NamedTuple):
+    """Messages produced by a workflow run, plus the names of any stages that failed"""
+    messages: List[Any]
+    failed_stages: List[str]
+
+STAGE_OK = "ok"
+STAGE_FAILED = "failed"
+
+# Given to downstream agents once an earlier stage has failed, so they don't spend turns hunting for its output
+_UPSTREAM_FAILED_NOTE = (
+    "An earlier planning step failed, so no live flight, hotel or activity pricing data is available "
+    "and the plan is built from typical prices. State in the itinerary that all prices are estimates."
+)
+
+# Tool observations the itinerary stage works from; everything else the search agent said is restated prose
+_ITINERARY_CONTEXT_TOOLS = frozenset({"search_flights", "search_hotels", "recommend_activities", "get_destination_info"})
+
+def _select_for_itinerary(messages):
+   """Keep the user's request and the search tool calls/results, dropping earlier agents' prose"""
+   selected = []
+   kept_call_ids = set()
+   for m in messages:
+       kind = getattr(m, "type", None)
+       if kind == "human":
+           selected.append(m)
+       elif kind == "ai" and m.tool_calls and all(c["name"] in _ITINERARY_CONTEXT_TOOLS for c in m.tool_calls):
+           # Tool results are only valid right after the call that requested them, so keep the pair together
+           selected.append(m)
+           kept_call_ids.update(c["id"] for c in m.tool_calls)
+       elif kind == "tool" and m.tool_call_id in kept_call_ids:
+           selected.append(m)
+   return selected
+
 @entrypoint()
-def travel_planner_workflow(input_data):
-   # Extract messages from the input dictionary
+async def travel_planner_workflow(input_data):
+   from langchain_core.messages import SystemMessage
+   
+   # Normalize the input to a list once; every agent task shares it
    if isinstance(input_data, dict):
-       current_messages = list(input_data.get("messages", []))
-   else:
-       current_messages = list(input_data)
+       input_data = input_data.get("messages", [])
+   current_messages = list(input_data) if isinstance(input_data, (list, tuple)) else [input_data]
    
-   # Create agent sequence with names for better logging
+   # One search agent issues the flight, hotel and activity lookups as a parallel tool-call batch;
+   # the itinerary stage optimizes the budget and builds the plan on its results
+   # Each entry may name a selector that trims the history down to what that agent needs
    agent_sequence = [
-       (call_flight_search_agent, "Flight Search Agent"),
-       (call_hotel_search_agent, "Hotel Search Agent"),
-       (call_activity_recommender_agent, "Activity Recommender Agent"),
-       (call_budget_optimizer_agent, "Budget Optimizer Agent"),
-       (call_itinerary_generator_agent, "Itinerary Generator Agent")
+       (call_search_agent, "Search Agent", None),
+       (call_itinerary_generator, "Itinerary Generator", _select_for_itinerary)
    ]
    
-   for agent_func, agent_name in agent_sequence:
+   stage_status: Dict[str, str] = {}
+   
+   for agent_func, agent_name, select_messages in agent_sequence:
        try:
-           print(f"Running {agent_name}...")
-           
-           agent_result = agent_func(current_messages).result()
+           logger.info("Running %s...", agent_name)
            
-           if isinstance(agent_result, list):
-               current_messages.extend(agent_result)
-           else:
-               current_messages.append(agent_result)
-               
+           agent_input = select_messages(current_messages) if select_messages else current_messages
+           if STAGE_FAILED in stage_status.values():
+               agent_input = [*agent_input, SystemMessage(content=_UPSTREAM_FAILED_NOTE)]
+           current_messages += await agent_func(agent_input)
+           stage_status[agent_name] = STAGE_OK
        except Exception as e:
-           print(f"Error in {agent_name}: {e}")
-           continue
+           logger.warning("Error in %s: %s", agent_name, e)
+           stage_status[agent_name] = STAGE_FAILED
+   
+   failed_stages = [name for name, status in stage_status.items() if status == STAGE_FAILED]
+   return PipelineResult(current_messages, failed_stages)
+
+# ============ PLAN-AND-EXECUTE WORKFLOW ============
+
+# Tools a plan may schedule; every plan step names one of these
+PLAN_TOOLS = {t.name: t for t in (search_flights, search_hotels, recommend_activities, get_destination_info,
+                                  optimize_travel_budget, generate_detailed_itinerary)}
+
+_PLANNER_PROMPT = (
+    "You are a travel planning compiler. Turn the user's request into a plan of tool calls. "
+    "Reply with only a JSON array and no other text. Each element is an object with "
+    "\"id\" (a short unique name), \"tool\" (one of the tools below), \"args\" (the tool's arguments) "
+    "and \"depends_on\" (ids of the steps whose results it needs). "
+    "To pass an earlier result as an argument, use the string \"$<id>\" or \"$<id>.<key>\", "
+    "for example \"$flights.flights\" or \"$budget.selected_hotel\". "
+    "Steps without dependencies run in parallel, so search flights, hotels, activities and destination info "
+    "independently, then optimize the budget from their results, then generate the itinerary from the "
+    "optimized selections and the destination info.\n\n"
+    "Tools:\n"
+) + "\n".join(f"- {name}({', '.join(t.args)}): {t.description}" for name, t in PLAN_TOOLS.items())
+
+_JOINER_PROMPT = (
+    "You are an itinerary planning specialist. The tool results for the user's trip are given below as JSON. "
+    "Present the final plan in a clear day-by-day format without emojis, covering the selected flight, hotel, "
+    "activities, budget breakdown and practical booking advice. Do not ask for confirmation."
+)
+
+def _plan_references(value):
+   """Yield the step ids referenced by "$id" / "$id.key" strings inside a step's arguments"""
+   if isinstance(value, str) and value.startswith("$"):
+       yield value[1:].partition(".")[0]
+   elif isinstance(value, dict):
+       for item in value.values():
+           yield from _plan_references(item)
+   elif isinstance(value, list):
+       for item in value:
+           yield from _plan_references(item)
+
+# Stands in for a reference into a failed step or a key its result doesn't have
+_UNRESOLVED = object()
+
+def _resolve_plan_args(value, results: Dict[str, Any], failed_steps=frozenset()):
+   """Substitute "$id" / "$id.key" references with the results of earlier steps.
+   
+   References into failed steps, or to keys missing from a result, resolve to _UNRESOLVED;
+   such items are dropped from nested lists and dicts.
+   """
+   if isinstance(value, str) and value.startswith("$"):
+       step_id, _, path = value[1:].partition(".")
+       if step_id not in results:
+           return value
+       if step_id in failed_steps:
+           return _UNRESOLVED
+       resolved = results[step_id]
+       for key in filter(None, path.split(".")):
+           resolved = resolved.get(key) if isinstance(resolved, dict) else None
+       return _UNRESOLVED if resolved is None else resolved
+   if isinstance(value, dict):
+       resolved_items = ((key, _resolve_plan_args(item, results, failed_steps)) for key, item in value.items())
+       return {key: item for key, item in resolved_items if item is not _UNRESOLVED}
+   if isinstance(value, list):
+       resolved_items = (_resolve_plan_args(item, results, failed_steps) for item in value)
+       return [item for item in resolved_items if item is not _UNRESOLVED]
+   return value
+
+def _fill_unresolved(plan_tool, tool_input: Dict[str, Any]) -> Dict[str, Any]:
+   """Give unresolved top-level arguments an empty value the tool's schema accepts.
+   
+   Lists and dicts become []/{} so tools with built-in fallbacks (the optimizer, the itinerary
+   builder) still run; anything else is left out so the tool's own default applies.
+   """
+   schema = getattr(plan_tool, "args", {})
+   filled = {}
+   for name, value in tool_input.items():
+       if value is _UNRESOLVED:
+           kind = schema.get(name, {}).get("type")
+           if kind == "array":
+               value = []
+           elif kind == "object":
+               value = {}
+           else:
+               continue
+       filled[name] = value
+   return filled
+
+def _parse_plan(text: str) -> List[Dict]:
+   """Extract and validate the JSON plan from the planner's reply"""
+   start, end = text.find("["), text.rfind("]")
+   if start == -1 or end < start:
+       raise ValueError("Planner reply did not contain a JSON plan")
+   
+   plan = orjson.loads(text[start:end + 1])
+   if not isinstance(plan, list) or not all(isinstance(step, dict) and isinstance(step.get("id"), str) for step in plan):
+       raise ValueError("Plan must be a list of steps, each with a string id")
+   
+   step_ids = {step["id"] for step in plan}
+   if len(step_ids) != len(plan):
+       raise ValueError("Plan step ids must be unique")
+   
+   for step in plan:
+       if step.get("tool") not in PLAN_TOOLS:
+           raise ValueError(f"Unknown tool in plan: {step.get('tool')}")
+       step.setdefault("args", {})
+       # Dependencies are whatever the step declares plus whatever its arguments reference
+       depends_on = set(step.get("depends_on") or ()) | set(_plan_references(step["args"]))
+       unknown = depends_on - step_ids
+       if unknown:
+           raise ValueError(f"Plan step {step.get('id')} depends on unknown steps: {', '.join(sorted(unknown))}")
+       step["depends_on"] = depends_on
+   
+   # Reject cycles up front rather than discovering them halfway through execution
+   resolved = set()
+   remaining = list(plan)
+   while remaining:
+       ready = [step for step in remaining if step["depends_on"] <= resolved]
+       if not ready:
+           raise ValueError(f"Plan has a dependency cycle among: {', '.join(step['id'] for step in remaining)}")
+       resolved.update(step["id"] for step in ready)
+       remaining = [step for step in remaining if step["id"] not in resolved]
+   
+   return plan
+
+async def _execute_plan(plan: List[Dict]) -> Dict[str, Any]:
+   """Run plan steps as soon as their dependencies resolve, with independent steps in flight together"""
+   pending = {step["id"]: step for step in plan}
+   waiting_on = {step["id"]: set(step["depends_on"]) for step in plan}
+   running: Dict[asyncio.Future, str] = {}
+   results: Dict[str, Any] = {}
+   failed_steps = set()
+   
+   while pending or running:
+       for step_id in [step_id for step_id in pending if not waiting_on[step_id]]:
+           step = pending.pop(step_id)
+           logger.info("Running plan step %s (%s)...", step_id, step['tool'])
+           plan_tool = PLAN_TOOLS[step["tool"]]
+           # A failed upstream step leaves empty inputs rather than sinking everything downstream of it
+           tool_input = _fill_unresolved(plan_tool, _resolve_plan_args(step["args"], results, failed_steps))
+           running[asyncio.ensure_future(plan_tool.ainvoke(tool_input))] = step_id
+       
+       done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+       for future in done:
+           step_id = running.pop(future)
+           try:
+               results[step_id] = future.result()
+           except Exception as e:
+               logger.warning("Error in plan step %s: %s", step_id, e)
+               results[step_id] = {"error": str(e)}
+               failed_steps.add(step_id)
+           for dependencies in waiting_on.values():
+               dependencies.discard(step_id)
+   
+   return results
+
+@entrypoint()
+async def travel_planner_compiled_workflow(input_data):
+   """Plan every tool call in one LLM turn, run the plan as a dependency graph, then write it up once"""
+   from langchain_core.messages import SystemMessage
+   
+   if isinstance(input_data, dict):
+       current_messages = list(input_data.get("messages", []))
+   else:
+       current_messages = list(input_data)
+   
+   try:
+       logger.info("Planning tool calls...")
+       plan_reply = await _invoke_llm(get_deterministic_model(), [SystemMessage(content=_PLANNER_PROMPT), *current_messages])
+       plan = _parse_plan(plan_reply.content)
+   except ValueError as e:
+       logger.warning("Could not build a tool plan (%s); falling back to the agent pipeline", e)
+       return await travel_planner_workflow.ainvoke({"messages": current_messages})
+   
+   logger.info("Executing plan with %s steps...", len(plan))
+   results = await _execute_plan(plan)
+   
+   logger.info("Writing up the trip plan...")
+   final_reply = await _invoke_llm(get_itinerary_writer(), [
+       SystemMessage(content=_JOINER_PROMPT),
+       *current_messages,
+       SystemMessage(content=orjson.dumps(results, default=str).decode())
+   ])
    
-   return current_messages
+   current_messages.append(final_reply)
+   return PipelineResult(current_messages, [])
 
 # ============ UTILITY FUNCTIONS ============
 
+def configure_logging(level: str = "INFO"):
+   """Send travel_buddy logs to stdout through a background thread so log calls never block on I/O"""
+   log_queue = queue.SimpleQueue()
+   stream_handler = logging.StreamHandler(sys.stdout)
+   stream_handler.setFormatter(logging.Formatter("%(message)s"))
+   
+   listener = logging.handlers.QueueListener(log_queue, stream_handler)
+   listener.start()
+   atexit.register(listener.stop)
+   
+   # Child loggers such as travel_buddy.cache are covered by this handler as well
+   logger.addHandler(logging.handlers.QueueHandler(log_queue))
+   logger.setLevel(level)
+   logger.propagate = False
+
 def pretty_print_messages(update):
+   from langchain_core.messages import convert_to_messages
+   
+   # Build the whole update first and write it once, rather than a print per line
+   out = io.StringIO()
+   
    if isinstance(update, tuple):
        ns, update = update
        if len(ns) == 0:
            return
        
        graph_id = ns[-1].split(":")[0]
-       print(f"Update from subgraph {graph_id}:")
-       print()
+       out.write(f"Update from subgraph {graph_id}:\n\n")
    
    for node_name, node_update in update.items():
-       print(f"Update from node {node_name}:")
-       print()
+       out.write(f"Update from node {node_name}:\n\n")
        
        for m in convert_to_messages(node_update["messages"]):
-           m.pretty_print()
-       print()
+           out.write(m.pretty_repr())
+           out.write("\n")
+       out.write("\n")
+   
+   sys.stdout.write(out.getvalue())
+
+# Messages that are tool payloads, the user's own prompt, or agent/tool error chatter
+_SKIP_RE = re.compile(r'^(?:\{|Transferring to|I want to plan a trip|Error:)')
+_SKIP_SUBSTR_RE = re.compile(r'validation errors|Field required|Please fix your mistakes')
+
+def _displayable_responses(messages, seen_content):
+   """Yield agent prose worth showing the user, skipping tool payloads, errors and repeats"""
+   for msg in messages:
+       if hasattr(msg, 'content') and msg.content and msg.content.strip():
+           content = msg.content.strip()
+
+           if not _SKIP_RE.match(content) and not _SKIP_SUBSTR_RE.search(content) and len(content) > 50:
+               # Compare whole responses, not prefixes, so distinct replies that open alike are all shown
+               if content not in seen_content:
+                   seen_content.add(content)
+                   yield content
+
+async def stream_trip_plan(workflow, messages):
+   """Run the workflow, printing agent summaries as each step finishes and the final answer token by token.
+   
+   Returns the names of any workflow stages that failed.
+   """
+   seen_content = set()
+   streamed_ids = set()
+   failed_stages = []
+   
+   async for mode, payload in workflow.astream({"messages": messages}, stream_mode=["messages", "updates"]):
+       if mode == "messages":
+           chunk, metadata = payload
+           if FINAL_RESPONSE_TAG in metadata.get("tags", ()) and isinstance(chunk.content, str) and chunk.content:
+               if chunk.id not in streamed_ids:
+                   streamed_ids.add(chunk.id)
+                   print()
+               print(chunk.content, end="", flush=True)
+           continue
+       
+       for step_result in payload.values():
+           if isinstance(step_result, PipelineResult):
+               failed_stages = step_result.failed_stages
+               step_result = step_result.messages
+           if not isinstance(step_result, list):
+               continue
+           
+           for response in _displayable_responses(
+               (m for m in step_result if getattr(m, "id", None) not in streamed_ids), seen_content
+           ):
+               print(f"\n{response}")
+               print("-" * 40)
+   
+   print()
+   return failed_stages
 
 # ============ MAIN EXECUTION ============
 
 if __name__ == "__main__":
+   configure_logging(os.getenv("TRAVEL_BUDDY_LOG_LEVEL", "INFO").upper())
+   
    print("\nWelcome to Travel Buddy™!")
    print("=" * 50)
    print("Note: This system uses dummy data for partner-only APIs (Booking.com, TripAdvisor, GetYourGuide)")
    print("Enter '0' for API keys you don't have access to.")
    print()
    
+   # Handshake with the flight API and build the agents while the user is still typing in trip details
+   warm_up_api_connections()
+   _API_POOL.submit(warm_up_agents)
+   
    print("Let's plan your trip!")
    destination = input("Where would you like to travel? ").strip()
+   # Resolve destination-only lookups while the remaining questions are answered
+   prefetch_destination_lookups(destination)
    departure_city = input("Where are you departing from? ").strip()
    departure_date = input("Departure date (YYYY-MM-DD): ").strip()
    return_date = input("Return date (YYYY-MM-DD, or press Enter for one-way): ").strip()
@@ -1554,42 +2584,21 @@ I'm interested in culture, food, and some adventure activities.
        
        print("Starting travel planning...")
        
-       result = travel_planner_workflow.invoke({"messages": [human_message]})
-       
-       if isinstance(result, list):
-           result_messages = result
+       # TRAVEL_BUDDY_PLANNER=dag plans all tool calls up front instead of running the agent chain
+       if os.getenv("TRAVEL_BUDDY_PLANNER") == "dag":
+           workflow = travel_planner_compiled_workflow
        else:
-           result_messages = result.get("messages", [])
+           workflow = travel_planner_workflow
        
-       print("\nTrip planning complete!")
-       print("=" * 70)
-       
-       seen_content = set()
-       unique_responses = []
+       failed_stages = asyncio.run(stream_trip_plan(workflow, [human_message]))
        
-       for msg in result_messages:
-           if hasattr(msg, 'content') and msg.content and msg.content.strip():
-               content = msg.content.strip()
-
-               if (not content.startswith('{') and 
-                   not content.startswith('Transferring to') and
-                   not content.startswith('I want to plan a trip') and
-                   not content.startswith('Error:') and
-                   not 'validation errors' in content and
-                   not 'Field required' in content and
-                   not 'Please fix your mistakes' in content and
-                   len(content) > 50):  
-                   
-                   content_signature = content[:200]
-                   if content_signature not in seen_content:
-                       seen_content.add(content_signature)
-                       unique_responses.append(content)
-       
-       for i, response in enumerate(unique_responses):
-           print(f"\n{response}")
-           if i < len(unique_responses) - 1:
-               print("-" * 40)
-               
+       if failed_stages:
+           print(f"\nTrip planning finished with errors in: {', '.join(failed_stages)}")
+           print("Results above may be incomplete or based on estimated prices.")
+       else:
+           print("\nTrip planning complete!")
+       print("=" * 70)
+
    except Exception as e:
        print(f"\nError planning trip: {e}")
        import traceback